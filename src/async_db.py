@@ -0,0 +1,85 @@
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_max_workers = 0
+# Calls submitted to the executor and not yet finished, and how many of
+# them a worker thread has picked up; the rest are waiting in the queue.
+_submitted = 0
+_running = 0
+_stats_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Return the executor used for blocking database calls.
+
+    It is sized to the connection pool so offloaded queries queue up here
+    instead of blocking worker threads on pool checkout.
+    """
+    global _executor, _max_workers
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _max_workers = int(
+                    os.getenv("DB_EXECUTOR_MAX_WORKERS",
+                              os.getenv("DB_POOL_MAX_SIZE", "10")))
+                _executor = ThreadPoolExecutor(max_workers=_max_workers,
+                                               thread_name_prefix="db")
+    return _executor
+
+
+def shutdown_executor() -> None:
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
+
+
+def _run_counted(func: Callable[[], T]) -> T:
+    global _running
+    with _stats_lock:
+        _running += 1
+    try:
+        return func()
+    finally:
+        with _stats_lock:
+            _running -= 1
+
+
+def _track_submitted(delta: int) -> None:
+    global _submitted
+    with _stats_lock:
+        _submitted += delta
+
+
+async def run_db(func: Callable[..., T], *args, **kwargs) -> T:
+    """Run a blocking database function without stalling the event loop."""
+    loop = asyncio.get_running_loop()
+    call = functools.partial(func, *args, **kwargs)
+    _track_submitted(1)
+    try:
+        return await loop.run_in_executor(
+            get_executor(), functools.partial(_run_counted, call))
+    finally:
+        _track_submitted(-1)
+
+
+def get_executor_stats() -> Dict[str, Any]:
+    if _executor is None:
+        return {"initialized": False}
+    with _stats_lock:
+        submitted, running = _submitted, _running
+    return {
+        "initialized": True,
+        "max_workers": _max_workers,
+        "in_flight": running,
+        "queued": max(submitted - running, 0),
+    }
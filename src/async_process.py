@@ -0,0 +1,131 @@
+import asyncio
+import os
+import signal
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence
+
+from task_logs import TaskLog
+
+# Longer lines are split, so one huge line cannot exhaust memory
+MAX_LINE_BYTES = 64 * 1024
+# Lines read but not yet handled; when full, the reader stops draining the
+# pipe and the child blocks on its next write
+QUEUE_LINES = 256
+# Seconds between SIGTERM and SIGKILL when a run is stopped
+KILL_GRACE_SECONDS = 5.0
+
+_DONE = object()
+
+
+@dataclass(frozen=True)
+class ProcessResult:
+    returncode: int
+    # Last lines of output, for error messages
+    tail: List[str]
+
+    def error(self) -> str:
+        return "\n".join(self.tail[-20:]).strip()
+
+
+async def _read_lines(stream: asyncio.StreamReader, name: str,
+                      queue: asyncio.Queue) -> None:
+    while True:
+        try:
+            line = await stream.readuntil(b"\n")
+        except asyncio.IncompleteReadError as e:
+            line = e.partial
+        except asyncio.LimitOverrunError as e:
+            line = await stream.read(e.consumed)
+        if not line:
+            return
+        await queue.put((name, line.decode("utf-8", "replace").rstrip("\r\n")))
+
+
+async def _handle_lines(queue: asyncio.Queue, tail: deque,
+                        log: Optional[TaskLog],
+                        on_line: Optional[Callable[[str, str], None]],
+                        redact: Optional[Callable[[str], str]]) -> None:
+    while True:
+        item = await queue.get()
+        if item is _DONE:
+            break
+        stream, text = item
+        if redact is not None:
+            text = redact(text)
+        tail.append(text)
+        if log is not None:
+            log.append(stream, text)
+        if on_line is not None:
+            on_line(stream, text)
+
+
+def _signal_group(process: asyncio.subprocess.Process, sig: int) -> None:
+    try:
+        os.killpg(process.pid, sig)
+    except ProcessLookupError:
+        pass
+
+
+async def _kill(process: asyncio.subprocess.Process,
+                grace: float = KILL_GRACE_SECONDS) -> None:
+    """Stop the process and everything it started."""
+    if process.returncode is not None:
+        return
+    _signal_group(process, signal.SIGTERM)
+    try:
+        await asyncio.wait_for(process.wait(), grace)
+    except asyncio.TimeoutError:
+        _signal_group(process, signal.SIGKILL)
+        await process.wait()
+
+
+async def run_process(args: Sequence[str],
+                      cwd: Optional[str] = None,
+                      env: Optional[Dict[str, str]] = None,
+                      timeout: Optional[float] = None,
+                      log: Optional[TaskLog] = None,
+                      on_line: Optional[Callable[[str, str], None]] = None,
+                      redact: Optional[Callable[[str], str]] = None,
+                      tail_lines: int = 200) -> ProcessResult:
+    """Run a command without blocking the event loop, streaming its output.
+
+    stdout and stderr are read line by line as they are produced, passed
+    through ``redact`` if given, and go to ``log`` and ``on_line``. The
+    command runs in its own process group, so on timeout or cancellation
+    the whole group is terminated, not just the direct child. Raises
+    TimeoutError after ``timeout`` seconds.
+    """
+    process = await asyncio.create_subprocess_exec(
+        *args,
+        cwd=cwd,
+        env=env,
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        start_new_session=True,
+        limit=MAX_LINE_BYTES)
+
+    queue: asyncio.Queue = asyncio.Queue(QUEUE_LINES)
+    tail: deque = deque(maxlen=tail_lines)
+    handler = asyncio.create_task(
+        _handle_lines(queue, tail, log, on_line, redact))
+
+    async def communicate() -> int:
+        await asyncio.gather(_read_lines(process.stdout, "stdout", queue),
+                             _read_lines(process.stderr, "stderr", queue))
+        await queue.put(_DONE)
+        await handler
+        return await process.wait()
+
+    try:
+        returncode = await asyncio.wait_for(communicate(), timeout)
+    except asyncio.TimeoutError:
+        await _kill(process)
+        raise TimeoutError(f"{args[0]} timed out after {timeout}s")
+    finally:
+        if process.returncode is None:
+            # Cancelled: don't leave the process group running
+            await asyncio.shield(_kill(process))
+        handler.cancel()
+    return ProcessResult(returncode, list(tail))
@@ -0,0 +1,99 @@
+"""Compare inline vs offloaded blocking queries under concurrency.
+
+Each simulated query sleeps for the given DB latency. Alongside the
+queries, lightweight probe requests that never touch the database are
+scheduled; their latency shows how much the event loop is stalled.
+
+Run from ``src/``::
+
+    python -m benchmarks.bench_db_offload
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from async_db import run_db, shutdown_executor
+
+
+def blocking_query(latency: float) -> int:
+    time.sleep(latency)
+    return 1
+
+
+async def inline_handler(latency: float) -> None:
+    blocking_query(latency)
+
+
+async def offloaded_handler(latency: float) -> None:
+    await run_db(blocking_query, latency)
+
+
+async def probe() -> None:
+    await asyncio.sleep(0)
+
+
+def percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def timed(coro_factory, latencies: list, arrival: float) -> None:
+    # Latency is measured from the intended arrival time, so time spent
+    # waiting for a blocked loop to schedule the request is included.
+    await asyncio.sleep(max(0.0, arrival - time.perf_counter()))
+    await coro_factory()
+    latencies.append(time.perf_counter() - arrival)
+
+
+async def run_round(handler, latency: float, requests: int,
+                    probes: int) -> tuple:
+    query_latencies, probe_latencies = [], []
+    start = time.perf_counter() + 0.01
+    jobs = [
+        timed(lambda: handler(latency), query_latencies, start)
+        for _ in range(requests)
+    ]
+    # Spread probes over the window in which the queries are in flight
+    window = max(latency, 0.001) * 2
+    jobs += [
+        timed(probe, probe_latencies, start + window * i / probes)
+        for i in range(probes)
+    ]
+    await asyncio.gather(*jobs)
+    return query_latencies, probe_latencies
+
+
+async def main_async(args) -> None:
+    print(f"{'mode':<10} {'db ms':>6} {'probe p50 ms':>13} "
+          f"{'probe p99 ms':>13} {'query p99 ms':>13}")
+    for latency_ms in args.latencies:
+        latency = latency_ms / 1000
+        for mode, handler in (("inline", inline_handler),
+                              ("offload", offloaded_handler)):
+            queries, probes = await run_round(handler, latency, args.requests,
+                                              args.probes)
+            print(f"{mode:<10} {latency_ms:>6} "
+                  f"{statistics.median(probes) * 1000:>13.2f} "
+                  f"{percentile(probes, 99) * 1000:>13.2f} "
+                  f"{percentile(queries, 99) * 1000:>13.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--probes", type=int, default=50)
+    parser.add_argument("--latencies",
+                        type=int,
+                        nargs="+",
+                        default=[1, 5, 20, 50])
+    args = parser.parse_args()
+    try:
+        asyncio.run(main_async(args))
+    finally:
+        shutdown_executor()
+
+
+if __name__ == "__main__":
+    main()
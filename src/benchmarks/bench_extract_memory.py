@@ -0,0 +1,98 @@
+"""Measure peak memory of PDF text extraction as the page count grows.
+
+``retained`` reproduces the previous loop, which kept pdfplumber's
+per-page layout objects alive and built the text with repeated string
+concatenation. ``streaming`` is the current serial extract_pdf_text_to,
+which releases every page after writing it to a file. Each run happens in a fresh
+process; the table shows peak RSS above the process's RSS after imports.
+
+Run from ``src/``::
+
+    python -m benchmarks.bench_extract_memory
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+
+import pdfplumber
+
+from benchmarks.pdfgen import write_pdf
+from extractors import ExtractionSettings
+from openhands import extract_pdf_text_to
+
+
+def retained_extract(pdf_location: str) -> int:
+    settings = ExtractionSettings()
+    with pdfplumber.open(pdf_location) as pdf:
+        text = ""
+        for page in pdf.pages:
+            words = page.extract_words(keep_blank_chars=True,
+                                       x_tolerance=settings.x_tolerance,
+                                       y_tolerance=settings.y_tolerance)
+            header_threshold = page.height * settings.header_ratio
+            footer_threshold = page.height * settings.footer_ratio
+            filtered_words = [
+                word for word in words
+                if not (word['top'] < header_threshold
+                        or word['bottom'] > footer_threshold)
+            ]
+            filtered_words.sort(key=lambda w: (w['top'], w['x0']))
+            page_text = ' '.join(word['text'] for word in filtered_words)
+            if page_text:
+                text += page_text + "\n"
+        return len(text.strip())
+
+
+def streaming_extract(pdf_location: str) -> int:
+    with tempfile.TemporaryFile("w+", encoding="utf-8") as out:
+        return extract_pdf_text_to(out,
+                                   pdf_location,
+                                   parallel=False,
+                                   extractor="pdfplumber")
+
+
+MODES = {"retained": retained_extract, "streaming": streaming_extract}
+
+
+def peak_rss() -> int:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def run_mode(mode: str, path: str, queue) -> None:
+    before = peak_rss()
+    start = time.perf_counter()
+    chars = MODES[mode](path)
+    queue.put((peak_rss() - before, time.perf_counter() - start, chars))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages",
+                        type=int,
+                        nargs="+",
+                        default=[10, 50, 200])
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context("spawn")
+    print(f"{'pages':>6} {'mode':<10} {'peak RSS +MB':>13} {'time s':>7} "
+          f"{'chars':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in args.pages:
+            path = write_pdf(os.path.join(tmp, f"{pages}.pdf"), pages)
+            for mode in MODES:
+                queue = ctx.Queue()
+                process = ctx.Process(target=run_mode,
+                                      args=(mode, path, queue))
+                process.start()
+                rss, elapsed, chars = queue.get()
+                process.join()
+                print(f"{pages:>6} {mode:<10} {rss / (1024 * 1024):>13.1f} "
+                      f"{elapsed:>7.2f} {chars:>9}")
+
+
+if __name__ == "__main__":
+    main()
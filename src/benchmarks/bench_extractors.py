@@ -0,0 +1,95 @@
+"""Benchmark PDF extractor backends and check them against pdfplumber.
+
+Every backend extracts the same corpus of generated PDFs in its own fresh
+process, so peak RSS is measured per backend. Text similarity is the
+difflib ratio over words against the pdfplumber reference output.
+
+Run from ``src/``::
+
+    python -m benchmarks.bench_extractors
+"""
+import argparse
+import difflib
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+
+from benchmarks.pdfgen import write_pdf
+from extractors import DEFAULT_EXTRACTOR, EXTRACTORS
+from openhands import extract_pdf_text
+
+
+def run_backend(name: str, paths: list, queue) -> None:
+    try:
+        texts = []
+        start = time.perf_counter()
+        for path in paths:
+            texts.append(extract_pdf_text(path, parallel=False, extractor=name))
+        elapsed = time.perf_counter() - start
+        # ru_maxrss is in kilobytes on Linux
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        queue.put((elapsed, peak_rss, texts, None))
+    except Exception as e:
+        queue.put((None, None, None, str(e)))
+
+
+def similarity(reference: str, text: str) -> float:
+    return difflib.SequenceMatcher(None, reference.split(), text.split(),
+                                   autojunk=False).ratio()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages",
+                        type=int,
+                        nargs="+",
+                        default=[1, 5, 20, 60])
+    parser.add_argument("--seeds", type=int, default=2)
+    parser.add_argument("--backends",
+                        nargs="+",
+                        default=list(EXTRACTORS),
+                        choices=list(EXTRACTORS))
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = [
+            write_pdf(os.path.join(tmp, f"{pages}-{seed}.pdf"),
+                      pages,
+                      seed=seed) for pages in args.pages
+            for seed in range(args.seeds)
+        ]
+        total_pages = sum(args.pages) * args.seeds
+        print(f"corpus: {len(paths)} PDFs, {total_pages} pages")
+        print(f"{'backend':<12} {'pages/s':>9} {'peak RSS MB':>12} "
+              f"{'mean sim':>9} {'min sim':>8} {'exact':>6}")
+
+        reference = None
+        backends = [DEFAULT_EXTRACTOR] + [
+            b for b in args.backends if b != DEFAULT_EXTRACTOR
+        ]
+        for name in backends:
+            queue = ctx.Queue()
+            process = ctx.Process(target=run_backend,
+                                  args=(name, paths, queue))
+            process.start()
+            elapsed, peak_rss, texts, error = queue.get()
+            process.join()
+            if error:
+                print(f"{name:<12} skipped: {error}")
+                continue
+
+            if reference is None:
+                reference = texts
+            scores = [similarity(r, t) for r, t in zip(reference, texts)]
+            exact = sum(r == t for r, t in zip(reference, texts))
+            print(f"{name:<12} {total_pages / elapsed:>9.1f} "
+                  f"{peak_rss / (1024 * 1024):>12.1f} "
+                  f"{sum(scores) / len(scores):>9.4f} {min(scores):>8.4f} "
+                  f"{exact:>3}/{len(texts):<2}")
+
+
+if __name__ == "__main__":
+    main()
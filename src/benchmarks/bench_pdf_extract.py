@@ -0,0 +1,72 @@
+"""Compare serial and page-parallel PDF text extraction.
+
+Generated PDFs of increasing length are extracted both ways; the parallel
+output is checked to be identical to the serial one. The process pool is
+started before timing, as it is in a long-running server.
+
+Run from ``src/``::
+
+    python -m benchmarks.bench_pdf_extract
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.pdfgen import write_pdf
+from openhands import extract_pdf_text, shutdown_extraction_pool
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages",
+                        type=int,
+                        nargs="+",
+                        default=[10, 50, 150])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    os.environ["PDF_EXTRACT_WORKERS"] = str(args.workers)
+    try:
+        run(args)
+    finally:
+        shutdown_extraction_pool()
+
+
+def run(args) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        warmup = write_pdf(os.path.join(tmp, "warmup.pdf"), 2)
+        _, startup = timed(extract_pdf_text, warmup, parallel=True)
+        print(f"workers={args.workers}, pool startup {startup:.2f}s")
+        print(f"{'pages':>6} {'serial s':>9} {'parallel s':>11} "
+              f"{'speedup':>8} {'identical':>10}")
+
+        for pages in args.pages:
+            path = write_pdf(os.path.join(tmp, f"{pages}.pdf"), pages)
+            serial_times, parallel_times = [], []
+            identical = True
+            for _ in range(args.repeat):
+                serial, serial_time = timed(extract_pdf_text,
+                                            path,
+                                            parallel=False)
+                parallel, parallel_time = timed(extract_pdf_text,
+                                                path,
+                                                parallel=True)
+                serial_times.append(serial_time)
+                parallel_times.append(parallel_time)
+                identical = identical and serial == parallel
+
+            serial_best, parallel_best = min(serial_times), min(parallel_times)
+            print(f"{pages:>6} {serial_best:>9.2f} {parallel_best:>11.2f} "
+                  f"{serial_best / parallel_best:>7.2f}x {str(identical):>10}")
+
+
+if __name__ == "__main__":
+    main()
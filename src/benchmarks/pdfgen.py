@@ -0,0 +1,85 @@
+"""Generate simple multi-page text PDFs for the extraction benchmarks.
+
+The files are written by hand with the standard Helvetica font, so no PDF
+library is needed. Each page has a header line, a footer line and a body
+of varied words laid out the way extract_pdf_text expects.
+"""
+import random
+
+WORDS = ("scheduler task repository upload extract parse layout worker "
+         "header footer lease claim storage cache docker container page "
+         "index query latency throughput request response stream buffer "
+         "process thread pool backend migration session token").split()
+
+PAGE_WIDTH = 612
+PAGE_HEIGHT = 792
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _page_stream(page_number: int, lines: int, rng: random.Random,
+                 marker: str) -> bytes:
+    ops = [
+        "BT /F1 9 Tf",
+        f"1 0 0 1 72 {PAGE_HEIGHT - 30} Tm (GhostDev specification) Tj",
+        "/F1 11 Tf",
+    ]
+    y = PAGE_HEIGHT - 100
+    if marker:
+        ops.append(f"1 0 0 1 72 {y} Tm ({_escape(marker)}) Tj")
+        y -= 14
+    for _ in range(lines):
+        words = " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 14)))
+        ops.append(f"1 0 0 1 72 {y} Tm ({_escape(words)}) Tj")
+        y -= 14
+    ops.append(f"/F1 9 Tf 1 0 0 1 290 30 Tm (Page {page_number}) Tj")
+    ops.append("ET")
+    return "\n".join(ops).encode("latin-1")
+
+
+def generate_pdf(pages: int,
+                 lines_per_page: int = 40,
+                 seed: int = 0,
+                 marker: str = "") -> bytes:
+    """Return the bytes of a ``pages``-page PDF.
+
+    ``marker`` is written as the first body line of every page.
+    """
+    rng = random.Random(seed)
+    first_page = 4
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [" + b" ".join(
+            b"%d 0 R" % (first_page + 2 * i)
+            for i in range(pages)) + b"] /Count %d >>" % pages,
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i in range(pages):
+        stream = _page_stream(i + 1, lines_per_page, rng, marker)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] "
+            b"/Contents %d 0 R /Resources << /Font << /F1 3 0 R >> >> >>" %
+            (PAGE_WIDTH, PAGE_HEIGHT, first_page + 2 * i + 1))
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream +
+                       b"\nendstream")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += (b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" %
+            (len(objects) + 1, xref))
+    return bytes(out)
+
+
+def write_pdf(path: str, pages: int, **kwargs) -> str:
+    with open(path, "wb") as f:
+        f.write(generate_pdf(pages, **kwargs))
+    return path
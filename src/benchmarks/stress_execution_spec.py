@@ -0,0 +1,159 @@
+"""Run many OpenHands tasks at once and check each sees only its own workspace.
+
+Every task gets its own checkout of a local git repository and a PDF that
+names the task. A stub container runtime stands in for docker: each exec
+checks that the mounted workspace and the prompt belong to the same task,
+writes a probe file into the workspace, waits until every run is inside
+the container at once, and checks the probe is still its own. The test
+fails if the runs never all overlap, since checkouts serialized upstream
+would otherwise leave isolation untested.
+
+Run from ``src/``::
+
+    python -m benchmarks.stress_execution_spec --tasks 32
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+import containers
+import openhands
+from benchmarks.pdfgen import write_pdf
+from containers import ContainerPool, ContainerRuntime, ContainerSpec
+from git_mirror import GitMirrorCache
+from task_logs import TaskLogStore
+from task_prompt import PROMPT_DIR
+from text_cache import TextCache
+
+
+class CheckingRuntime(ContainerRuntime):
+
+    def __init__(self, tasks: int, hold: float, barrier_timeout: float):
+        self.tasks = tasks
+        self.hold = hold
+        self.barrier_timeout = barrier_timeout
+        self.active = 0
+        self.max_active = 0
+        self.errors = []
+        self.all_active = asyncio.Event()
+
+    def pull(self, image: str) -> str:
+        return image
+
+    def create(self, name: str, spec: ContainerSpec) -> str:
+        return name
+
+    def remove(self, container_id: str) -> None:
+        pass
+
+    async def exec(self,
+                   container_id,
+                   command,
+                   env,
+                   timeout=None,
+                   log=None) -> int:
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        if self.active == self.tasks:
+            self.all_active.set()
+        try:
+            workspace = Path(env["SANDBOX_VOLUMES"].split(":")[0])
+            task_id = workspace.name
+            # The specification is handed over in the workspace
+            prompt = " ".join(
+                p.read_text()
+                for p in sorted((workspace / PROMPT_DIR).rglob("*.md")))
+            if f"task-{task_id} " not in f"{prompt} ":
+                self.errors.append(f"task {task_id} got another prompt")
+
+            probe = workspace / "probe"
+            probe.write_text(task_id)
+            # Every run holds its workspace until all of them are running
+            try:
+                await asyncio.wait_for(self.all_active.wait(),
+                                       self.barrier_timeout)
+            except asyncio.TimeoutError:
+                self.errors.append(
+                    f"task {task_id} never overlapped with all "
+                    f"{self.tasks} runs (peak {self.max_active})")
+            await asyncio.sleep(self.hold)
+            if probe.read_text() != task_id:
+                self.errors.append(f"task {task_id} workspace was shared")
+            return 0
+        finally:
+            self.active -= 1
+
+
+def make_repository(path: Path) -> str:
+    path.mkdir()
+    for args in (["init", "-q"], ["config", "user.email", "stress@example"],
+                 ["config", "user.name", "stress"]):
+        subprocess.run(["git", *args], cwd=path, check=True)
+    (path / "README").write_text("stress\n")
+    subprocess.run(["git", "add", "."], cwd=path, check=True)
+    subprocess.run(["git", "commit", "-qm", "init"], cwd=path, check=True)
+    return path.as_uri()
+
+
+async def run_all(tasks: int, repo_url: str, pdfs: list) -> list:
+    results = await asyncio.gather(*(openhands.run_openhands(
+        1, i, repo_url, pdfs[i]) for i in range(tasks)),
+                                   return_exceptions=True)
+    return [r for r in results if isinstance(r, BaseException)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=16)
+    parser.add_argument("--hold",
+                        type=float,
+                        default=0.2,
+                        help="seconds each stub run keeps its workspace busy")
+    parser.add_argument("--barrier-timeout",
+                        type=float,
+                        default=60.0,
+                        help="seconds a run waits for all others to start")
+    args = parser.parse_args()
+
+    os.environ.setdefault("LLM_API_KEY", "stress-test")
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        repo_url = make_repository(root / "origin")
+        pdfs = [
+            write_pdf(str(root / f"{i}.pdf"), 1, lines_per_page=2,
+                      marker=f"task-{i}") for i in range(args.tasks)
+        ]
+
+        runtime = CheckingRuntime(args.tasks, args.hold,
+                                  args.barrier_timeout)
+        openhands.git_mirrors = GitMirrorCache(root / "repos")
+        openhands.text_cache = TextCache(str(root / "text"))
+        containers.container_pool = ContainerPool(runtime,
+                                                  ContainerSpec("stub"),
+                                                  size=args.tasks)
+
+        openhands.task_logs = TaskLogStore(str(root / "logs"))
+        started = time.perf_counter()
+        failures = asyncio.run(run_all(args.tasks, repo_url, pdfs))
+        elapsed = time.perf_counter() - started
+        containers.shutdown_container_pool()
+
+    print(f"tasks: {args.tasks}, wall time {elapsed:.2f}s, "
+          f"peak concurrent runs {runtime.max_active}")
+    for error in runtime.errors + [str(f) for f in failures]:
+        print(f"FAIL: {error}")
+    if runtime.max_active < args.tasks:
+        print(f"FAIL: peak concurrency {runtime.max_active} never reached "
+              f"{args.tasks}, isolation under overlap was not tested")
+    if runtime.errors or failures or runtime.max_active < args.tasks:
+        raise SystemExit(1)
+    print(f"OK: all {args.tasks} runs overlapped, each mounted its own "
+          "workspace")
+
+
+if __name__ == "__main__":
+    main()
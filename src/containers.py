@@ -0,0 +1,383 @@
+import asyncio
+import json
+import os
+import subprocess
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Sequence
+
+from async_process import run_process
+from task_logs import TaskLog
+
+DEFAULT_OPENHANDS_IMAGE = "docker.all-hands.dev/all-hands-ai/openhands:0.39"
+DEFAULT_RUNTIME_IMAGE = (
+    "docker.all-hands.dev/all-hands-ai/runtime:0.39-nikolaik")
+CONTAINER_LABEL = "ghostdev.pool"
+# Set on the runtime containers OpenHands starts next to an app container,
+# with the app container's id, so they are removed along with it
+RUNTIME_OWNER_LABEL = "ghostdev.pool.owner"
+
+
+@dataclass(frozen=True)
+class ContainerSpec:
+    """How pooled OpenHands app containers are created."""
+    image: str
+    env: Dict[str, str] = field(default_factory=dict)
+    volumes: Sequence[str] = ()
+    extra_args: Sequence[str] = ()
+
+
+class ContainerRuntime(ABC):
+    """Minimal container operations the pool needs."""
+
+    @abstractmethod
+    def pull(self, image: str) -> str:
+        """Pull ``image`` and return a reference pinned to its digest."""
+
+    @abstractmethod
+    def create(self, name: str, spec: ContainerSpec) -> str:
+        """Start an idle container and return its id."""
+
+    @abstractmethod
+    async def exec(self,
+                   container_id: str,
+                   command: Sequence[str],
+                   env: Dict[str, str],
+                   timeout: Optional[float] = None,
+                   log: Optional[TaskLog] = None) -> int:
+        """Run ``command`` inside a container, returning its exit code.
+
+        Output is streamed to ``log``. Raises TimeoutError if it runs longer
+        than ``timeout`` seconds.
+        """
+
+    @abstractmethod
+    def remove(self, container_id: str) -> None:
+        ...
+
+
+class DockerRuntime(ContainerRuntime):
+    """ContainerRuntime backed by the docker CLI."""
+
+    def _docker(self, *args: str) -> str:
+        try:
+            result = subprocess.run(["docker", *args],
+                                    check=True,
+                                    capture_output=True,
+                                    text=True)
+        except subprocess.CalledProcessError as e:
+            raise RuntimeError(
+                f"docker {args[0]} failed: {e.stderr.strip()}")
+        return result.stdout.strip()
+
+    def pull(self, image: str) -> str:
+        if "@sha256:" in image:
+            # Already pinned, only pull when it is missing locally
+            try:
+                self._docker("image", "inspect", image)
+                return image
+            except RuntimeError:
+                pass
+        self._docker("pull", "--quiet", image)
+        digest = self._docker("image", "inspect", "--format",
+                              "{{index .RepoDigests 0}}", image)
+        return digest or image
+
+    def create(self, name: str, spec: ContainerSpec) -> str:
+        args = ["run", "--detach", "--name", name, "--label", CONTAINER_LABEL]
+        for key, value in spec.env.items():
+            args += ["-e", f"{key}={value}"]
+        for volume in spec.volumes:
+            args += ["-v", volume]
+        args += [*spec.extra_args, spec.image, "sleep", "infinity"]
+        return self._docker(*args)
+
+    async def exec(self,
+                   container_id: str,
+                   command: Sequence[str],
+                   env: Dict[str, str],
+                   timeout: Optional[float] = None,
+                   log: Optional[TaskLog] = None) -> int:
+        # OpenHands starts its runtime container through the docker socket
+        # with these arguments, labelling it as this container's
+        env = {
+            **env,
+            "SANDBOX_DOCKER_RUNTIME_KWARGS":
+            json.dumps({"labels": {
+                RUNTIME_OWNER_LABEL: container_id
+            }}),
+        }
+        args = ["docker", "exec"]
+        for key in env:
+            # Values come from the client's environment, not the command line
+            args += ["-e", key]
+        # Only the CLI client is killed on timeout or cancellation; the pool
+        # then removes the container and the runtime containers it started
+        result = await run_process([*args, container_id, *command],
+                                   env={
+                                       **os.environ,
+                                       **env
+                                   },
+                                   timeout=timeout,
+                                   log=log)
+        return result.returncode
+
+    def remove(self, container_id: str) -> None:
+        try:
+            self._docker("rm", "--force", container_id)
+        finally:
+            # Logged, not raised, so it can't mask an error from the rm above
+            try:
+                self._remove_runtimes(container_id)
+            except Exception as e:
+                print(f"Error removing runtime containers of "
+                      f"{container_id}: {e}")
+
+    def _remove_runtimes(self, container_id: str) -> None:
+        # Siblings on the host's docker, they outlive the app container
+        runtimes = self._docker(
+            "ps", "--all", "--quiet", "--filter",
+            f"label={RUNTIME_OWNER_LABEL}={container_id}")
+        if runtimes:
+            self._docker("rm", "--force", *runtimes.split())
+
+
+class ContainerPool:
+    """Pre-created OpenHands app containers handed out to tasks.
+
+    ``start`` pulls the images once, pins them to their digests and starts
+    ``size`` idle containers. Tasks ``acquire`` one and ``release`` it when
+    done. With ``reuse`` a container that finished cleanly goes back to the
+    pool; otherwise it is removed and a replacement is created in the
+    background, so the next task still finds a warm one.
+    """
+
+    def __init__(self,
+                 runtime: ContainerRuntime,
+                 spec: ContainerSpec,
+                 size: int = 2,
+                 reuse: bool = False,
+                 pull_images: Sequence[str] = ()):
+        self.runtime = runtime
+        self.spec = spec
+        self.size = size
+        self.reuse = reuse
+        self.pull_images = list(pull_images)
+        self.pinned: Dict[str, str] = {}
+        self._idle: Deque[str] = deque()
+        self._in_use: set = set()
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._closed = False
+        self.warm_starts = 0
+        self.cold_starts = 0
+        self.failures = 0
+
+    def start(self) -> None:
+        """Pull and pin the images, then fill the pool. Blocking."""
+        for image in [self.spec.image, *self.pull_images]:
+            self.pinned[image] = self.runtime.pull(image)
+        self.spec = ContainerSpec(self.pinned[self.spec.image],
+                                  self.spec.env, self.spec.volumes,
+                                  self.spec.extra_args)
+        self._replenish()
+
+    def pinned_image(self, image: str) -> str:
+        return self.pinned.get(image, image)
+
+    def _create(self) -> str:
+        name = f"openhands-pool-{uuid.uuid4().hex[:12]}"
+        return self.runtime.create(name, self.spec)
+
+    def _replenish(self) -> None:
+        while True:
+            with self._lock:
+                if (self._closed
+                        or len(self._idle) + self._pending >= self.size):
+                    return
+                self._pending += 1
+            try:
+                container_id = self._create()
+            except Exception as e:
+                print(f"Error creating pooled container: {e}")
+                with self._lock:
+                    self._pending -= 1
+                    self.failures += 1
+                return
+
+            with self._lock:
+                self._pending -= 1
+                if self._closed:
+                    remove = True
+                else:
+                    self._idle.append(container_id)
+                    remove = False
+            if remove:
+                self.runtime.remove(container_id)
+
+    def _replenish_soon(self) -> None:
+        threading.Thread(target=self._replenish,
+                         name="container-pool",
+                         daemon=True).start()
+
+    def acquire(self) -> str:
+        with self._lock:
+            container_id = self._idle.popleft() if self._idle else None
+            if container_id is not None:
+                self.warm_starts += 1
+        if container_id is None:
+            # Pool drained, the task pays for a cold start
+            container_id = self._create()
+            with self._lock:
+                self.cold_starts += 1
+        with self._lock:
+            self._in_use.add(container_id)
+        self._replenish_soon()
+        return container_id
+
+    def release(self, container_id: str, healthy: bool = True) -> None:
+        with self._lock:
+            self._in_use.discard(container_id)
+            keep = (self.reuse and healthy and not self._closed
+                    and len(self._idle) < self.size)
+            if keep:
+                self._idle.append(container_id)
+        if not keep:
+            try:
+                self.runtime.remove(container_id)
+            except Exception as e:
+                print(f"Error removing container {container_id}: {e}")
+            self._replenish_soon()
+
+    async def _acquire_async(self) -> str:
+        # A cold start runs docker, keep it off the event loop
+        acquire = asyncio.ensure_future(asyncio.to_thread(self.acquire))
+        try:
+            return await asyncio.shield(acquire)
+        except asyncio.CancelledError:
+
+            def release(future):
+                if not future.cancelled() and future.exception() is None:
+                    future.get_loop().run_in_executor(None, self.release,
+                                                      future.result(), False)
+
+            acquire.add_done_callback(release)
+            raise
+
+    async def run(self,
+                  command: Sequence[str],
+                  env: Dict[str, str],
+                  timeout: Optional[float] = None,
+                  log: Optional[TaskLog] = None) -> int:
+        """Run ``command`` in a pooled container, returning its exit code."""
+        container_id = await self._acquire_async()
+        healthy = False
+        try:
+            returncode = await self.runtime.exec(container_id, command, env,
+                                                 timeout, log)
+            healthy = returncode == 0
+            return returncode
+        finally:
+            # Removing an unhealthy container runs docker too
+            await asyncio.shield(
+                asyncio.to_thread(self.release, container_id, healthy))
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+        for container_id in idle:
+            try:
+                self.runtime.remove(container_id)
+            except Exception as e:
+                print(f"Error removing container {container_id}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": self.size,
+                "reuse": self.reuse,
+                "image": self.spec.image,
+                "idle": len(self._idle),
+                "in_use": len(self._in_use),
+                "starting": self._pending,
+                "warm_starts": self.warm_starts,
+                "cold_starts": self.cold_starts,
+                "failures": self.failures,
+            }
+
+
+container_pool: Optional[ContainerPool] = None
+_container_pool_lock = threading.Lock()
+
+
+def runtime_image() -> str:
+    """The sandbox image OpenHands starts for each run."""
+    return os.getenv("OPENHANDS_RUNTIME_IMAGE", DEFAULT_RUNTIME_IMAGE)
+
+
+def openhands_container_spec() -> ContainerSpec:
+    return ContainerSpec(
+        image=os.getenv("OPENHANDS_IMAGE", DEFAULT_OPENHANDS_IMAGE),
+        env={
+            "SANDBOX_USER_ID": str(os.getuid()),
+            "LOG_ALL_EVENTS": "true",
+        },
+        volumes=[
+            "/var/run/docker.sock:/var/run/docker.sock",
+            f"{os.path.expanduser('~')}/.openhands-state:/.openhands-state",
+        ],
+        extra_args=["--add-host", "host.docker.internal:host-gateway"])
+
+
+def get_container_pool() -> ContainerPool:
+    global container_pool
+    if container_pool is None:
+        # The warm-up thread, handlers and the scheduler race to create it,
+        # a second pool would leak its containers
+        with _container_pool_lock:
+            if container_pool is None:
+                container_pool = ContainerPool(
+                    DockerRuntime(),
+                    openhands_container_spec(),
+                    size=int(os.getenv("OPENHANDS_POOL_SIZE", "2")),
+                    reuse=os.getenv("OPENHANDS_POOL_REUSE",
+                                    "false") == "true",
+                    pull_images=[runtime_image()])
+    return container_pool
+
+
+def start_container_pool() -> None:
+    """Warm the pool on a background thread, pulls can take minutes."""
+
+    def warm():
+        started = time.monotonic()
+        try:
+            get_container_pool().start()
+            print(f"OpenHands container pool warm after "
+                  f"{time.monotonic() - started:.1f}s")
+        except Exception as e:
+            print(f"Error warming OpenHands container pool: {e}")
+
+    threading.Thread(target=warm, name="container-pool", daemon=True).start()
+
+
+def shutdown_container_pool() -> None:
+    global container_pool
+    with _container_pool_lock:
+        pool, container_pool = container_pool, None
+    if pool is not None:
+        pool.shutdown()
+
+
+def get_container_pool_stats() -> Optional[Dict[str, Any]]:
+    return container_pool.stats() if container_pool else None
+
+
+def openhands_command(task: str) -> List[str]:
+    return ["python", "-m", "openhands.core.main", "-t", task]
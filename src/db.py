@@ -1,17 +1,261 @@
 import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
 import psycopg2
+from psycopg2 import extensions
 
 
-def get_db_connection():
-    """Create and return a database connection."""
+class PoolTimeout(Exception):
+    """Raised when no pooled connection becomes available in time."""
+
+
+def _connect():
     try:
-        connection = psycopg2.connect(user=os.getenv("SUPABASE_USER"),
-                                      password=os.getenv("SUPABASE_PASSWORD"),
-                                      host=os.getenv("SUPABASE_HOST"),
-                                      port=os.getenv("SUPABASE_PORT"),
-                                      dbname=os.getenv("SUPABASE_DB_NAME"))
-        print("Connection successful!")
-        return connection
+        return psycopg2.connect(user=os.getenv("SUPABASE_USER"),
+                                password=os.getenv("SUPABASE_PASSWORD"),
+                                host=os.getenv("SUPABASE_HOST"),
+                                port=os.getenv("SUPABASE_PORT"),
+                                dbname=os.getenv("SUPABASE_DB_NAME"))
     except Exception as e:
         print(f"Failed to connect: {e}")
         raise
+
+
+class ConnectionPool:
+    """Thread-safe pool of psycopg2 connections.
+
+    Connections are health-checked before being handed out if they have been
+    idle longer than ``health_check_after`` seconds, and idle connections
+    above ``min_size`` are closed once they exceed ``max_idle`` seconds.
+    """
+
+    def __init__(self,
+                 min_size: int = 1,
+                 max_size: int = 10,
+                 timeout: float = 30.0,
+                 max_idle: float = 300.0,
+                 health_check_after: float = 30.0,
+                 connect=_connect):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Invalid pool size configuration")
+
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.health_check_after = health_check_after
+        self._connect = connect
+
+        self._cond = threading.Condition()
+        # Idle connections as (connection, last_used) pairs, most recent last
+        self._idle: List[tuple] = []
+        self._in_use = 0
+        self._closed = False
+
+        self._created = 0
+        self._discarded = 0
+        self._checkouts = 0
+        self._waits = 0
+        self._timeouts = 0
+
+        for _ in range(min_size):
+            self._idle.append((self._new_connection(), time.monotonic()))
+
+    def _new_connection(self):
+        conn = self._connect()
+        with self._cond:
+            self._created += 1
+        return conn
+
+    def _discard(self, conn) -> None:
+        with self._cond:
+            self._discarded += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _is_healthy(self, conn, last_used: float) -> bool:
+        if conn.closed:
+            return False
+        if time.monotonic() - last_used < self.health_check_after:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def _recycle_idle(self) -> None:
+        """Close idle connections above min_size that exceeded max_idle."""
+        now = time.monotonic()
+        keep = []
+        # Oldest first, so the freshest connections are the ones kept
+        excess = len(self._idle) + self._in_use - self.min_size
+        for conn, last_used in self._idle:
+            if excess > 0 and now - last_used > self.max_idle:
+                self._discard(conn)
+                excess -= 1
+            else:
+                keep.append((conn, last_used))
+        self._idle = keep
+
+    def getconn(self):
+        """Check a connection out of the pool, waiting up to ``timeout``."""
+        deadline = time.monotonic() + self.timeout
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("Connection pool is closed")
+
+                    self._recycle_idle()
+                    if self._idle or self._in_use < self.max_size:
+                        break
+
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeout(
+                            f"No database connection available after {self.timeout}s"
+                        )
+                    self._waits += 1
+                    self._cond.wait(remaining)
+
+                # Reserve the slot; health checks and connects run unlocked
+                idle = self._idle.pop() if self._idle else None
+                self._in_use += 1
+
+            try:
+                if idle is None:
+                    conn = self._new_connection()
+                else:
+                    conn, last_used = idle
+                    if not self._is_healthy(conn, last_used):
+                        self._discard(conn)
+                        with self._cond:
+                            self._in_use -= 1
+                            self._cond.notify()
+                        continue
+            except Exception:
+                with self._cond:
+                    self._in_use -= 1
+                    self._cond.notify()
+                raise
+
+            with self._cond:
+                self._checkouts += 1
+            return conn
+
+    def putconn(self, conn, discard: bool = False) -> None:
+        """Return a connection to the pool, resetting any open transaction."""
+        if not discard and not conn.closed:
+            try:
+                status = conn.info.transaction_status
+                if status != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except Exception:
+                discard = True
+
+        with self._cond:
+            self._in_use -= 1
+            if discard or conn.closed or self._closed:
+                self._discard(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Yield a pooled connection, committing on success.
+
+        The transaction is rolled back if the block raises, and connections
+        that were broken during the block are dropped instead of reused.
+        """
+        conn = self.getconn()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+            self.putconn(conn, discard=conn.closed != 0)
+            raise
+        else:
+            self.putconn(conn)
+
+    def closeall(self) -> None:
+        with self._cond:
+            self._closed = True
+            for conn, _ in self._idle:
+                self._discard(conn)
+            self._idle = []
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "created": self._created,
+                "discarded": self._discarded,
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "timeouts": self._timeouts,
+                "closed": self._closed,
+            }
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """Return the process-wide connection pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    min_size=int(os.getenv("DB_POOL_MIN_SIZE", "1")),
+                    max_size=int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+                    timeout=float(os.getenv("DB_POOL_TIMEOUT", "30")),
+                    max_idle=float(os.getenv("DB_POOL_MAX_IDLE", "300")),
+                    health_check_after=float(
+                        os.getenv("DB_POOL_HEALTH_CHECK_AFTER", "30")))
+    return _pool
+
+
+def close_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    if _pool is None:
+        return {"initialized": False}
+    return {"initialized": True, **_pool.stats()}
+
+
+def get_dedicated_connection():
+    """Open a connection outside the pool for long-lived uses like LISTEN."""
+    return _connect()
+
+
+@contextmanager
+def get_db_connection():
+    """Borrow a connection from the pool for the duration of the block."""
+    with get_pool().connection() as connection:
+        yield connection
@@ -0,0 +1,166 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Union
+
+PENDING = "pending"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+@dataclass(frozen=True)
+class DueTask:
+    task_id: int
+    task_name: str
+    repo_id: int
+    user_id: int
+    pdf_file_path: str
+    pdf_sha256: Optional[str] = None
+
+
+class TaskExecutor:
+    """Run due tasks concurrently on a bounded pool.
+
+    ``run_task`` is either a coroutine function, awaited on the event loop,
+    or a blocking callable executed on a dedicated thread pool of
+    ``max_workers`` threads. Only coroutines really stop on timeout or
+    cancellation; a thread keeps running until the callable returns.
+    ``on_status`` is awaited on every status transition with the task, the
+    new status and an optional error message. Runs stopped by ``shutdown``
+    go back to ``pending``, whether they had started or not, so another
+    worker picks them up; ``cancel`` fails them.
+    """
+
+    def __init__(self,
+                 run_task: Callable[[DueTask], Union[None, Awaitable[None]]],
+                 on_status: Callable[[DueTask, str, Optional[str]],
+                                     Awaitable[Any]],
+                 max_workers: int = 4,
+                 timeout: Optional[float] = None):
+        self.run_task = run_task
+        self.on_status = on_status
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._threads = ThreadPoolExecutor(max_workers=max_workers,
+                                           thread_name_prefix="task")
+        self._semaphore = asyncio.Semaphore(max_workers)
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._active = 0
+        self._shutting_down = False
+        self.succeeded = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.cancelled = 0
+        self.released = 0
+
+    def is_running(self, task_id: int) -> bool:
+        return task_id in self._tasks
+
+    def task_ids(self) -> list[int]:
+        return list(self._tasks)
+
+    def capacity(self) -> int:
+        """Number of tasks that can be submitted without queueing."""
+        return max(0, self.max_workers - len(self._tasks))
+
+    def submit(self, task: DueTask) -> bool:
+        """Schedule a task unless it is already queued or running here."""
+        if task.task_id in self._tasks:
+            return False
+        self._tasks[task.task_id] = asyncio.create_task(self._run(task))
+        return True
+
+    def cancel(self, task_id: int) -> bool:
+        future = self._tasks.get(task_id)
+        if future is None:
+            return False
+        return future.cancel()
+
+    async def _run(self, task: DueTask) -> None:
+        started = False
+        try:
+            async with self._semaphore:
+                started = True
+                self._active += 1
+                try:
+                    await self._execute(task)
+                finally:
+                    self._active -= 1
+        except asyncio.CancelledError:
+            if not started:
+                # Claimed but still queued behind the running tasks
+                await self._stopped(task)
+            raise
+        finally:
+            self._tasks.pop(task.task_id, None)
+
+    async def _stopped(self, task: DueTask) -> None:
+        if self._shutting_down:
+            # Not the task's fault, another worker runs it
+            self.released += 1
+            await self.on_status(task, PENDING, None)
+        else:
+            self.cancelled += 1
+            self.failed += 1
+            await self.on_status(task, FAILED, "Cancelled")
+
+    async def _execute(self, task: DueTask) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            await self.on_status(task, RUNNING, None)
+        except Exception as e:
+            print(f"Error starting task {task.task_id}: {e}")
+            return
+
+        try:
+            if asyncio.iscoroutinefunction(self.run_task):
+                run = self.run_task(task)
+            else:
+                run = loop.run_in_executor(self._threads, self.run_task, task)
+            await asyncio.wait_for(run, self.timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            self.failed += 1
+            await self.on_status(task, FAILED,
+                                 f"Timed out after {self.timeout}s")
+        except asyncio.CancelledError:
+            await self._stopped(task)
+            raise
+        except Exception as e:
+            self.failed += 1
+            await self.on_status(task, FAILED, str(e))
+        else:
+            self.succeeded += 1
+            await self.on_status(task, SUCCEEDED, None)
+
+    async def shutdown(self) -> None:
+        self._shutting_down = True
+        for future in list(self._tasks.values()):
+            future.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self._threads.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_workers": self.max_workers,
+            "timeout": self.timeout,
+            "running": self._active,
+            "queued": len(self._tasks) - self._active,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "timed_out": self.timed_out,
+            "cancelled": self.cancelled,
+            "released": self.released,
+        }
+
+
+def executor_settings() -> Dict[str, Any]:
+    timeout = os.getenv("TASK_TIMEOUT_SECONDS", "3600")
+    return {
+        "max_workers":
+        int(os.getenv("TASK_EXECUTOR_MAX_WORKERS", str(os.cpu_count() or 1))),
+        "timeout":
+        float(timeout) if timeout else None,
+    }
@@ -0,0 +1,170 @@
+import hashlib
+import json
+import logging
+import os
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterator, Optional
+
+import pdfplumber
+
+# Configure logging to suppress pdfplumber warnings
+logging.getLogger('pdfminer').setLevel(logging.ERROR)
+
+# Bump when an extractor changes output for the same settings
+EXTRACTOR_VERSION = 1
+DEFAULT_EXTRACTOR = "pdfplumber"
+
+
+@dataclass(frozen=True)
+class ExtractionSettings:
+    # Word grouping tolerances, only used by pdfplumber
+    x_tolerance: float = 3
+    y_tolerance: float = 3
+    # Words above/below these fractions of the page height are dropped
+    header_ratio: float = 0.1
+    footer_ratio: float = 0.9
+
+    def fingerprint(self, extractor: str = DEFAULT_EXTRACTOR) -> str:
+        settings = {
+            "version": EXTRACTOR_VERSION,
+            "extractor": extractor,
+            **asdict(self)
+        }
+        encoded = json.dumps(settings, sort_keys=True).encode()
+        return hashlib.sha256(encoded).hexdigest()[:16]
+
+
+class PdfExtractor(ABC):
+    """A PDF text-extraction backend.
+
+    Backends return the body text of each page: words inside the header and
+    footer bands are dropped, and the rest are ordered top to bottom, left
+    to right and joined with single spaces.
+    """
+
+    name = ""
+
+    @abstractmethod
+    def page_count(self, pdf_location: str) -> int:
+        ...
+
+    @abstractmethod
+    def page_texts(self,
+                   pdf_location: str,
+                   settings: ExtractionSettings,
+                   start: int = 0,
+                   stop: Optional[int] = None) -> Iterator[str]:
+        """Yield the text of pages ``start`` to ``stop - 1`` in order."""
+
+
+def _join_words(words, page_height: float,
+                settings: ExtractionSettings) -> str:
+    """Filter header/footer words and join the rest in reading order.
+
+    ``words`` are ``(top, bottom, x0, text)`` tuples in page coordinates
+    with the origin at the top-left corner.
+    """
+    header_threshold = page_height * settings.header_ratio
+    footer_threshold = page_height * settings.footer_ratio
+
+    filtered_words = [
+        word for word in words
+        if not (word[0] < header_threshold or word[1] > footer_threshold)
+    ]
+
+    # Sort words by their position (top to bottom, left to right)
+    filtered_words.sort(key=lambda w: (w[0], w[2]))
+
+    # Join the words with appropriate spacing
+    return ' '.join(word[3] for word in filtered_words)
+
+
+class PdfplumberExtractor(PdfExtractor):
+    """Reference backend, built on pdfminer's layout analysis."""
+
+    name = "pdfplumber"
+
+    def page_count(self, pdf_location: str) -> int:
+        with pdfplumber.open(pdf_location) as pdf:
+            return len(pdf.pages)
+
+    def page_texts(self,
+                   pdf_location: str,
+                   settings: ExtractionSettings,
+                   start: int = 0,
+                   stop: Optional[int] = None) -> Iterator[str]:
+        with pdfplumber.open(pdf_location) as pdf:
+            for page in pdf.pages[start:stop]:
+                # Extract text with layout information
+                words = page.extract_words(keep_blank_chars=True,
+                                           x_tolerance=settings.x_tolerance,
+                                           y_tolerance=settings.y_tolerance)
+                text = _join_words(
+                    [(w['top'], w['bottom'], w['x0'], w['text'])
+                     for w in words], page.height, settings)
+                # pdf.pages keeps every page alive, so drop the parsed
+                # layout objects before moving on to the next one
+                del words
+                page.close()
+                yield text
+
+
+class PyMuPDFExtractor(PdfExtractor):
+    """MuPDF-based backend, several times faster than pdfplumber.
+
+    MuPDF splits words on spaces, while pdfplumber keeps runs of words on a
+    line together; after joining with spaces the text is the same for
+    ordinary documents.
+    """
+
+    name = "pymupdf"
+
+    def __init__(self):
+        try:
+            import pymupdf
+        except ImportError as e:
+            raise RuntimeError(
+                "The pymupdf extractor requires PyMuPDF to be installed") from e
+        self._pymupdf = pymupdf
+        self._flags = pymupdf.TEXTFLAGS_WORDS & ~pymupdf.TEXT_MEDIABOX_CLIP
+
+    def page_count(self, pdf_location: str) -> int:
+        with self._pymupdf.open(pdf_location) as doc:
+            return doc.page_count
+
+    def page_texts(self,
+                   pdf_location: str,
+                   settings: ExtractionSettings,
+                   start: int = 0,
+                   stop: Optional[int] = None) -> Iterator[str]:
+        with self._pymupdf.open(pdf_location) as doc:
+            stop = doc.page_count if stop is None else min(
+                stop, doc.page_count)
+            for number in range(start, stop):
+                page = doc[number]
+                # (x0, y0, x1, y1, word, block_no, line_no, word_no);
+                # pdfplumber keeps text running past the page edge too
+                words = page.get_text("words",
+                                      flags=self._flags,
+                                      clip=self._pymupdf.INFINITE_RECT())
+                yield _join_words([(w[1], w[3], w[0], w[4]) for w in words],
+                                  page.rect.height, settings)
+
+
+EXTRACTORS = {
+    PdfplumberExtractor.name: PdfplumberExtractor,
+    PyMuPDFExtractor.name: PyMuPDFExtractor,
+}
+
+_extractors: Dict[str, PdfExtractor] = {}
+
+
+def get_extractor(name: Optional[str] = None) -> PdfExtractor:
+    """Return the named backend, defaulting to ``PDF_EXTRACTOR``."""
+    name = name or os.getenv("PDF_EXTRACTOR", DEFAULT_EXTRACTOR)
+    if name not in _extractors:
+        if name not in EXTRACTORS:
+            raise ValueError(f"Unknown PDF extractor: {name}")
+        _extractors[name] = EXTRACTORS[name]()
+    return _extractors[name]
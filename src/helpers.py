@@ -1,17 +1,32 @@
+import asyncio
+import base64
+import functools
 from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Optional, List, Dict, Any
-from fastapi import FastAPI, Request, HTTPException, UploadFile
+from typing import AsyncIterator, Optional, List, Dict, Any, Tuple
+from fastapi import BackgroundTasks, FastAPI, Request, HTTPException, UploadFile
 from authlib.integrations.starlette_client import OAuth
 from fastapi.responses import RedirectResponse
 from pydantic import BaseModel
 from starlette.config import Config
 import os
-import shutil
-import uuid
 from starlette.middleware.sessions import SessionMiddleware
-from db import get_db_connection
-from scheduler import setup_scheduler
+from async_db import run_db, shutdown_executor
+from cache import TTLCache
+from containers import shutdown_container_pool, start_container_pool
+from db import close_pool, get_db_connection
+from executor import FAILED, PENDING, RUNNING, SUCCEEDED
+from migrations import check_schema
+from openhands import open_pdf_text, shutdown_extraction_pool
+from repo_sync import repo_sync
+from task_events import FINISHED_STATUSES, TaskEvent, task_events
+from task_logs import task_logs
+from timing import RequestTimer
+from uploads import (SavedUpload, limit_upload_size, local_pdf_path,
+                     register_pdf_blob, save_pdf_upload)
+from scheduler import (TASK_CHANNEL, cancel_task, notify_task_scheduled,
+                       setup_scheduler, shutdown_task_executor,
+                       task_notification_payload)
 
 from typing import Optional
 from dataclasses import dataclass
@@ -19,26 +34,21 @@ from dataclasses import dataclass
 
 def upsert_github_user(github_id: int) -> bool:
     try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-
-        # First check if user exists
-        cur.execute(
-            """
-            SELECT user_id FROM "User" WHERE user_id = %s
-            """, (github_id, ))
-
-        if cur.fetchone() is None:
-            # User doesn't exist, insert them
+        with get_db_connection() as conn, conn.cursor() as cur:
+            # First check if user exists
             cur.execute(
                 """
-                INSERT INTO "User" (user_id)
-                VALUES (%s)
+                SELECT user_id FROM "User" WHERE user_id = %s
                 """, (github_id, ))
-            conn.commit()
 
-        cur.close()
-        conn.close()
+            if cur.fetchone() is None:
+                # User doesn't exist, insert them
+                cur.execute(
+                    """
+                    INSERT INTO "User" (user_id)
+                    VALUES (%s)
+                    """, (github_id, ))
+
         return True
     except Exception as db_error:
         print(f"Database error in upsert_github_user: {db_error}")
@@ -46,18 +56,43 @@ def upsert_github_user(github_id: int) -> bool:
 
 
 def get_token_by_session_id(session_id: str) -> Optional[dict]:
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute("SELECT token FROM Session WHERE session_id = %s",
-                (session_id, ))
-    row = cur.fetchone()
+    with get_db_connection() as conn, conn.cursor() as cur:
+        cur.execute("SELECT token FROM Session WHERE session_id = %s",
+                    (session_id, ))
+        row = cur.fetchone()
     return row[0] if row else None
 
 
+# Authenticated users keyed by session id, holding (user_data, token)
+user_cache = TTLCache(maxsize=int(os.getenv("USER_CACHE_MAX_SIZE", "1024")),
+                      ttl=float(os.getenv("USER_CACHE_TTL", "300")))
+
+
+# Live task events: idle keepalive interval, client reconnect delay and log
+# lines replayed to a new viewer of a task not running in this process
+SSE_KEEPALIVE_SECONDS = float(os.getenv("SSE_KEEPALIVE_SECONDS", "15"))
+SSE_RETRY_MS = 3000
+SSE_LOG_REPLAY_LINES = int(os.getenv("SSE_LOG_REPLAY_LINES", "200"))
+
+# Task listings: default and largest page size
+TASK_PAGE_SIZE = int(os.getenv("TASK_PAGE_SIZE", "50"))
+TASK_PAGE_MAX_SIZE = int(os.getenv("TASK_PAGE_MAX_SIZE", "200"))
+TASK_STATUSES = (PENDING, RUNNING, SUCCEEDED, FAILED)
+
+
+def invalidate_cached_user(session_id: Optional[str]) -> None:
+    if session_id:
+        user_cache.invalidate(session_id)
+
+
 async def get_current_user(request: Request, oauth: OAuth) -> tuple[dict, str]:
     session_id = request.session.get('session_id')
     if session_id:
-        token = get_token_by_session_id(session_id)
+        cached = user_cache.get(session_id)
+        if cached is not None:
+            return cached
+
+        token = await run_db(get_token_by_session_id, session_id)
         if token:
             resp = await oauth.github.get('user', token=token)
             if not resp or resp.status_code != 200:
@@ -80,9 +115,10 @@ async def get_current_user(request: Request, oauth: OAuth) -> tuple[dict, str]:
                 'avatar_url': profile.get('avatar_url')
             }
 
+            user_cache.set(session_id, (user_data, token))
             return user_data, token
 
-    return None
+    return None, None
 
 
 def format_date(date_str: str) -> str:
@@ -121,33 +157,15 @@ async def fetch_github_repositories(
         token: dict,
         visibility: str = "all") -> List[Dict[str, Any]]:
     """Fetch and format GitHub repositories based on visibility."""
-    resp = await oauth.github.get('user/repos', token=token)
-    if not resp or resp.status_code != 200:
-        raise HTTPException(status_code=400,
-                            detail="Failed to fetch repositories from GitHub")
-
-    repos = resp.json()
+    repos = await repo_sync.get_repositories(oauth, token)
 
     # Filter repositories based on visibility
     if visibility == "public":
-        repos = [repo for repo in repos if not repo['private']]
+        return [repo for repo in repos if not repo['private']]
     elif visibility == "private":
-        repos = [repo for repo in repos if repo['private']]
-
-    # Format the repository information
-    return [{
-        'id': repo['id'],
-        'full_name': repo['full_name'],
-        'name': repo['name'],
-        'description': repo['description'],
-        'url': repo['html_url'],
-        'stars': repo['stargazers_count'],
-        'forks': repo['forks_count'],
-        'language': repo['language'],
-        'private': repo['private'],
-        'created_at': repo['created_at'],
-        'updated_at': repo['updated_at']
-    } for repo in repos]
+        return [repo for repo in repos if repo['private']]
+
+    return list(repos)
 
 
 async def get_or_create_session(request: Request, oauth: OAuth) -> str:
@@ -163,116 +181,96 @@ async def get_or_create_session(request: Request, oauth: OAuth) -> str:
 
     user_id = resp.json()['id']
 
-    inserted_or_exists = upsert_github_user(user_id)
+    inserted_or_exists = await run_db(upsert_github_user, user_id)
     if inserted_or_exists:
-        session_id = create_session(user_id, token)
+        session_id = await run_db(create_session, user_id, token)
         return session_id
 
 
 def create_session(user_id: str, token: str) -> str:
-    conn = get_db_connection()
-    cur = conn.cursor()
-
-    # Try to fetch existing session
-    cur.execute("SELECT session_id FROM Session WHERE user_id = %s",
-                (user_id, ))
-    row = cur.fetchone()
-
-    if row is not None:
-        # Update the token and return existing session_id
-        cur.execute("UPDATE Session SET token = %s WHERE user_id = %s",
-                    (token, user_id))
-        session_id = row[0]
-    else:
-        # Insert new session and get session_id (PostgreSQL style)
-        cur.execute(
-            """
-            INSERT INTO Session (user_id, token) 
-            VALUES (%s, %s) 
-            RETURNING session_id
-        """, (user_id, token))
-        session_id = cur.fetchone()[0]
-
-    conn.commit()
-    cur.close()
-    conn.close()
-    return session_id
-
-
-def save_pdf_file(file: UploadFile, user_id: int) -> str:
-    # Create uploads directory if it doesn't exist
-    upload_dir = os.path.join("uploads", str(user_id))
-    os.makedirs(upload_dir, exist_ok=True)
-
-    # Generate unique filename
-    file_extension = os.path.splitext(file.filename)[1]
-    unique_filename = f"{uuid.uuid4()}{file_extension}"
-    file_path = os.path.join(upload_dir, unique_filename)
+    with get_db_connection() as conn, conn.cursor() as cur:
+        # Try to fetch existing session
+        cur.execute("SELECT session_id FROM Session WHERE user_id = %s",
+                    (user_id, ))
+        row = cur.fetchone()
 
-    # Save file
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+        if row is not None:
+            # Update the token and return existing session_id
+            cur.execute("UPDATE Session SET token = %s WHERE user_id = %s",
+                        (token, user_id))
+            session_id = row[0]
+        else:
+            # Insert new session and get session_id (PostgreSQL style)
+            cur.execute(
+                """
+                INSERT INTO Session (user_id, token) 
+                VALUES (%s, %s) 
+                RETURNING session_id
+            """, (user_id, token))
+            session_id = cur.fetchone()[0]
 
-    return file_path
+    return session_id
 
 
 def create_repository(repo_id: int, user_id: int) -> None:
     """Create a new repository in the database if it doesn't exist."""
     try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-
-        # Check if repository exists
-        cur.execute(
-            """
-            SELECT repo_id FROM "Repo" WHERE repo_id = %s
-            """, (repo_id, ))
-
-        if cur.fetchone() is None:
-            # Repository doesn't exist, create it
+        with get_db_connection() as conn, conn.cursor() as cur:
+            # Check if repository exists
             cur.execute(
                 """
-                INSERT INTO "Repo" (repo_id, user_id)
-                VALUES (%s, %s)
-                """, (repo_id, user_id))
-            conn.commit()
-
-        cur.close()
-        conn.close()
+                SELECT repo_id FROM "Repo" WHERE repo_id = %s
+                """, (repo_id, ))
+
+            if cur.fetchone() is None:
+                # Repository doesn't exist, create it
+                cur.execute(
+                    """
+                    INSERT INTO "Repo" (repo_id, user_id)
+                    VALUES (%s, %s)
+                    """, (repo_id, user_id))
     except Exception as e:
         print(f"Error creating repository: {e}")
         raise HTTPException(status_code=500,
                             detail="Failed to create repository")
 
 
-def create_task(repo_id: int, task_name: str, pdf_file_path: str, user_id: int,
-                scheduled_time: datetime) -> Dict[str, Any]:
+def create_task(repo_id: int, task_name: str, upload: SavedUpload,
+                user_id: int, scheduled_time: datetime) -> Dict[str, Any]:
+    pdf_file_path = upload.key
     try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-
         # First ensure the repository exists
         create_repository(repo_id, user_id)
 
-        # Create the task
-        cur.execute(
-            """
-            INSERT INTO "Task" (repo_id, task_name, pdf_file_path, scheduled_time)
-            VALUES (%s, %s, %s, %s)
-            RETURNING task_id, created_at, scheduled_time
-            """, (repo_id, task_name, pdf_file_path, scheduled_time))
+        with get_db_connection() as conn, conn.cursor() as cur:
+            # Tasks share one stored copy per distinct PDF
+            register_pdf_blob(cur, upload)
 
-        task_id, created_at, scheduled_time = cur.fetchone()
+            # Create the task
+            cur.execute(
+                """
+                INSERT INTO "Task" (repo_id, user_id, task_name, pdf_file_path, pdf_sha256, scheduled_time)
+                VALUES (%s, %s, %s, %s, %s, %s)
+                RETURNING task_id, created_at, scheduled_time
+                """, (repo_id, user_id, task_name, pdf_file_path,
+                      upload.sha256, scheduled_time))
 
-        # Update pending tasks count
-        cur.execute(
-            """
-            UPDATE "Repo"
-            SET pending_tasks = pending_tasks + 1
-            WHERE repo_id = %s
-            """, (repo_id, ))
+            task_id, created_at, scheduled_time = cur.fetchone()
+
+            # Update pending tasks count
+            cur.execute(
+                """
+                UPDATE "Repo"
+                SET pending_tasks = pending_tasks + 1
+                WHERE repo_id = %s
+                """, (repo_id, ))
 
-        conn.commit()
+            # Wake the schedulers of other replicas once this commits
+            cur.execute("SELECT pg_notify(%s, %s)",
+                        (TASK_CHANNEL,
+                         task_notification_payload(task_id, scheduled_time)))
+
+        notify_task_scheduled(task_id, scheduled_time)
 
         task = {
             "task_id":
@@ -291,115 +289,250 @@ def create_task(repo_id: int, task_name: str, pdf_file_path: str, user_id: int,
             scheduled_time.isoformat() if scheduled_time else None
         }
 
-        cur.close()
-        conn.close()
         return task
     except Exception as e:
         print(f"Error creating task: {e}")
         raise HTTPException(status_code=500, detail="Failed to create task")
 
 
-def get_user_tasks(user_id: int) -> List[Dict[str, Any]]:
-    """Get all tasks for a user."""
-    try:
-        conn = get_db_connection()
-        cur = conn.cursor()
+class TaskSummary(BaseModel):
+    task_id: int
+    repo_id: int
+    task_name: str
+    created_at: str
+    scheduled_time: Optional[str]
+    status: str
+
+
+class TaskPage(BaseModel):
+    tasks: List[TaskSummary]
+    # Pass back as ``cursor`` for the next page; None on the last page
+    next_cursor: Optional[str] = None
 
-        cur.execute(
-            """
-            SELECT task_id, user_id, repo_id, task_name, pdf_file_path, created_at, scheduled_time
-            FROM "Task"
-            WHERE user_id = %s
-            ORDER BY created_at DESC
-            """, (user_id, ))
-
-        tasks = []
-        for row in cur.fetchall():
-            task = {
-                "task_id": row[0],
-                "user_id": row[1],
-                "repo_id": row[2],
-                "task_name": row[3],
-                "pdf_file_path": row[4],
-                "created_at": row[5].isoformat(),
-                "scheduled_time": row[6].isoformat() if row[6] else None
-            }
-            tasks.append(task)
 
-        cur.close()
-        conn.close()
-        return tasks
+@dataclass(frozen=True)
+class TaskFilters:
+    statuses: tuple = ()
+    scheduled_after: Optional[datetime] = None
+    scheduled_before: Optional[datetime] = None
+
+
+def encode_task_cursor(created_at: datetime, task_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{task_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_task_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, task_id = raw.decode().rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(task_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def parse_task_filters(statuses: Optional[List[str]] = None,
+                       scheduled_after: Optional[str] = None,
+                       scheduled_before: Optional[str] = None) -> TaskFilters:
+    """Validate the filters of a task listing request.
+
+    Statuses may be repeated or comma-separated; the scheduled window is
+    inclusive of ``scheduled_after`` and exclusive of ``scheduled_before``.
+    """
+    wanted = tuple(
+        dict.fromkeys(s.strip() for value in statuses or []
+                      for s in value.split(",") if s.strip()))
+    unknown = [s for s in wanted if s not in TASK_STATUSES]
+    if unknown:
+        raise HTTPException(status_code=400,
+                            detail=f"Unknown task status: {unknown[0]}")
+    return TaskFilters(
+        wanted,
+        parse_scheduled_time(scheduled_after) if scheduled_after else None,
+        parse_scheduled_time(scheduled_before) if scheduled_before else None)
+
+
+def _task_conditions(filters: TaskFilters,
+                     cursor: Optional[str]) -> tuple[List[str], List[Any]]:
+    conditions: List[str] = []
+    params: List[Any] = []
+    if filters.statuses:
+        conditions.append("AND t.status = ANY(%s)")
+        params.append(list(filters.statuses))
+    if filters.scheduled_after is not None:
+        conditions.append("AND t.scheduled_time >= %s")
+        params.append(filters.scheduled_after)
+    if filters.scheduled_before is not None:
+        conditions.append("AND t.scheduled_time < %s")
+        params.append(filters.scheduled_before)
+    if cursor:
+        conditions.append("AND (t.created_at, t.task_id) < (%s, %s)")
+        params.extend(decode_task_cursor(cursor))
+    return conditions, params
+
+
+# Task columns of a page query, in the order _task_page reads them
+TASK_PAGE_COLUMNS = ("t.task_id, t.repo_id, t.task_name, t.created_at, "
+                     "t.scheduled_time, t.status")
+TASK_PAGE_ORDER = "ORDER BY t.created_at DESC, t.task_id DESC"
+
+
+def _task_page(rows: List[tuple], limit: int) -> TaskPage:
+    # Queries fetch one extra row to tell whether another page follows
+    tasks = [
+        TaskSummary(task_id=row[0],
+                    repo_id=row[1],
+                    task_name=row[2],
+                    created_at=row[3].isoformat(),
+                    scheduled_time=row[4].isoformat() if row[4] else None,
+                    status=row[5]) for row in rows[:limit]
+    ]
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_task_cursor(last[3], last[0])
+    return TaskPage(tasks=tasks, next_cursor=next_cursor)
+
+
+def query_user_task_page(cur,
+                         user_id: int,
+                         filters: TaskFilters = TaskFilters(),
+                         cursor: Optional[str] = None,
+                         limit: int = TASK_PAGE_SIZE) -> TaskPage:
+    """Fetch one page of a user's tasks, newest first, on an open cursor.
+
+    Pages continue strictly after the ``(created_at, task_id)`` of the last
+    task of the previous page, so each page is one index range scan of
+    ``limit + 1`` rows however much history precedes it, and tasks created
+    meanwhile never shift rows between pages.
+    """
+    conditions, params = _task_conditions(filters, cursor)
+    cur.execute(
+        f"""
+        SELECT {TASK_PAGE_COLUMNS}
+        FROM "Task" t
+        WHERE t.user_id = %s {" ".join(conditions)}
+        {TASK_PAGE_ORDER}
+        LIMIT %s
+        """, [user_id] + params + [limit + 1])
+    return _task_page(cur.fetchall(), limit)
+
+
+def query_repo_task_page(
+        cur,
+        repo_id: int,
+        user_id: int,
+        filters: TaskFilters = TaskFilters(),
+        cursor: Optional[str] = None,
+        limit: int = TASK_PAGE_SIZE) -> Optional[tuple[TaskPage, int, int]]:
+    """Fetch one page of a repository's tasks with its pending/completed
+    counts, in a single query.
+
+    The repository row is the outer side of a lateral join, which checks
+    ownership and still yields the counts when no task matches. Returns
+    None if the user has no such repository. Pages are keyset-paginated
+    like ``query_user_task_page``.
+    """
+    conditions, params = _task_conditions(filters, cursor)
+    cur.execute(
+        f"""
+        SELECT r.pending_tasks, r.completed_tasks, t.*
+        FROM "Repo" r
+        LEFT JOIN LATERAL (
+            SELECT {TASK_PAGE_COLUMNS}
+            FROM "Task" t
+            WHERE t.repo_id = r.repo_id {" ".join(conditions)}
+            {TASK_PAGE_ORDER}
+            LIMIT %s
+        ) t ON true
+        WHERE r.repo_id = %s AND r.user_id = %s
+        """, params + [limit + 1, repo_id, user_id])
+    rows = cur.fetchall()
+    if not rows:
+        return None
+    page = _task_page([row[2:] for row in rows if row[2] is not None], limit)
+    return page, rows[0][0], rows[0][1]
+
+
+def get_user_tasks(user_id: int,
+                   filters: TaskFilters = TaskFilters(),
+                   cursor: Optional[str] = None,
+                   limit: int = TASK_PAGE_SIZE) -> TaskPage:
+    """Get one page of a user's tasks across repositories."""
+    try:
+        with get_db_connection() as conn, conn.cursor() as cur:
+            return query_user_task_page(cur, user_id, filters, cursor, limit)
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error fetching tasks: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch tasks")
 
 
-def get_repo_tasks(repo_id: int, user_id: int) -> List[Dict[str, Any]]:
-    try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-
-        cur.execute(
-            """
-            SELECT t.task_id, t.created_at, t.task_name, t.repo_id, t.pdf_file_path, t.scheduled_time, t.task_completed
-            FROM "Task" t
-            JOIN "Repo" r ON t.repo_id = r.repo_id
-            WHERE t.repo_id = %s AND r.user_id = %s
-            ORDER BY t.created_at DESC
-            """, (repo_id, user_id))
-
-        tasks = []
-        for row in cur.fetchall():
-            created_at = row[1].isoformat() if hasattr(row[1],
-                                                       'isoformat') else row[1]
-            scheduled_time = row[5].isoformat() if row[5] and hasattr(
-                row[5], 'isoformat') else row[5]
-
-            task = {
-                "task_id": row[0],
-                "repo_id": row[3],
-                "task_name": row[2],
-                "pdf_file_path": row[4],
-                "created_at": created_at,
-                "scheduled_time": scheduled_time,
-                "task_completed": row[6]
-            }
-            tasks.append(task)
+def get_repo_tasks_with_counts(
+        repo_id: int,
+        user_id: int,
+        filters: TaskFilters = TaskFilters(),
+        cursor: Optional[str] = None,
+        limit: int = TASK_PAGE_SIZE) -> tuple[TaskPage, int, int]:
+    """Get one page of a repository's tasks and its pending/completed
+    counts in one round-trip.
 
-        cur.close()
-        conn.close()
-        return tasks
+    A repository without tasks has no row yet and yields an empty page.
+    """
+    try:
+        with get_db_connection() as conn, conn.cursor() as cur:
+            result = query_repo_task_page(cur, repo_id, user_id, filters,
+                                          cursor, limit)
+        return result or (TaskPage(tasks=[]), 0, 0)
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error fetching repository tasks: {e}")
         raise HTTPException(status_code=500,
                             detail="Failed to fetch repository tasks")
 
 
-async def get_task_details(task_id: int, user_id: int, oauth: OAuth,
-                           token: dict) -> Dict[str, Any]:
+def get_repo_tasks(repo_id: int,
+                   user_id: int,
+                   filters: TaskFilters = TaskFilters(),
+                   cursor: Optional[str] = None,
+                   limit: int = TASK_PAGE_SIZE) -> TaskPage:
+    """Get one page of a repository's tasks."""
+    return get_repo_tasks_with_counts(repo_id, user_id, filters, cursor,
+                                      limit)[0]
 
-    try:
-        conn = get_db_connection()
-        cur = conn.cursor()
 
-        # First get the task and repo_id from the database
+def get_task_row(task_id: int, user_id: int) -> Optional[tuple]:
+    with get_db_connection() as conn, conn.cursor() as cur:
         cur.execute(
             """
-            SELECT t.task_id, t.created_at, t.task_name, t.repo_id, t.pdf_file_path, t.scheduled_time, t.task_completed, r.repo_id
+            SELECT t.task_id, t.created_at, t.task_name, t.repo_id, t.pdf_file_path, t.scheduled_time, t.task_completed, t.pdf_sha256,
+                   t.status, t.last_error
             FROM "Task" t
             JOIN "Repo" r ON t.repo_id = r.repo_id
             WHERE t.task_id = %s AND r.user_id = %s
             """, (task_id, user_id))
+        return cur.fetchone()
 
-        row = cur.fetchone()
+
+async def get_task_details(task_id: int,
+                           user_id: int,
+                           oauth: OAuth,
+                           token: dict,
+                           timer: Optional[RequestTimer] = None
+                           ) -> Dict[str, Any]:
+    timer = timer or RequestTimer()
+    try:
+        # First get the task and repo_id from the database
+        row = await timer.measure("db",
+                                  run_db(get_task_row, task_id, user_id))
         if not row:
             raise HTTPException(status_code=404, detail="Task not found")
 
-        # Get repository details from GitHub API
-        repos = await fetch_github_repositories(oauth, token, "all")
-        repo_info = next((r for r in repos if r['id'] == row[3]), None)
-        if not repo_info:
-            raise HTTPException(status_code=404, detail="Repository not found")
+        # Get repository details from GitHub API, this needs the repo_id
+        repo_info = await timer.measure(
+            "github", repo_sync.get_repository(oauth, token, row[3]))
 
         task = {
             "task_id":
@@ -417,14 +550,18 @@ async def get_task_details(task_id: int, user_id: int, oauth: OAuth,
             if row[5] and hasattr(row[5], 'isoformat') else row[5],
             "task_completed":
             row[6],
+            "pdf_sha256":
+            row[7],
+            "status":
+            row[8],
+            "last_error":
+            row[9],
             "repo_name":
             repo_info['name'],
             "repo_url":
             repo_info['url']
         }
 
-        cur.close()
-        conn.close()
         return task
     except Exception as e:
         print(f"Error fetching task details: {e}")
@@ -432,13 +569,97 @@ async def get_task_details(task_id: int, user_id: int, oauth: OAuth,
                             detail="Failed to fetch task details")
 
 
+async def cancel_running_task(task_id: int, user_id: int) -> Dict[str, Any]:
+    row = await run_db(get_task_row, task_id, user_id)
+    if not row:
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    if not cancel_task(task_id):
+        raise HTTPException(status_code=409,
+                            detail="Task is not running on this server")
+
+    return {"task_id": task_id, "cancelled": True}
+
+
+async def task_event_stream(task_id: int, status: str, error: Optional[str],
+                            last_event_id: Optional[str]
+                            ) -> AsyncIterator[str]:
+    """Server-Sent Events with a task's status transitions and log lines.
+
+    A new viewer first gets a ``reset``, the current status and the recent
+    log, then live events. A viewer reconnecting with the id of the last
+    event it saw only gets the events it missed. The stream ends once the
+    task finished.
+    """
+    with task_events.subscribe(task_id, last_event_id) as subscription:
+        yield f"retry: {SSE_RETRY_MS}\n\n"
+        events = subscription.backlog
+        if not subscription.resumed:
+            yield TaskEvent("reset", {}).format()
+            yield TaskEvent("status", {
+                "status": status,
+                "error": error
+            }).format()
+            if not events:
+                # Not running in this process, show what earlier runs logged
+                lines = await asyncio.to_thread(task_logs.read_tail, task_id,
+                                                SSE_LOG_REPLAY_LINES)
+                for line in lines:
+                    yield TaskEvent("log", {"text": line.rstrip("\n")}).format()
+
+        statuses = [e.data["status"] for e in events if e.event == "status"]
+        for event in events:
+            yield event.format()
+        if (statuses[-1] if statuses else status) in FINISHED_STATUSES:
+            return
+
+        while True:
+            try:
+                event = await subscription.next(SSE_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                # Keeps proxies from closing an idle connection
+                yield ": keepalive\n\n"
+                continue
+            if event is None:
+                # Fell behind, the client reconnects and resumes
+                return
+            yield event.format()
+            if (event.event == "status"
+                    and event.data["status"] in FINISHED_STATUSES):
+                return
+
+
+def get_token_by_user_id(user_id: int) -> Optional[dict]:
+    with get_db_connection() as conn, conn.cursor() as cur:
+        cur.execute("SELECT token FROM Session WHERE user_id = %s",
+                    (user_id, ))
+        row = cur.fetchone()
+    return row[0] if row else None
+
+
+async def get_task_repo_url(oauth: OAuth, repo_id: int,
+                            user_id: int) -> Tuple[str, str]:
+    """Clone URL of a repository and the access token of the task's owner.
+
+    Scheduled tasks run without a request, so the owner's stored session
+    token is used for both the repository lookup and the clone. The URL
+    carries no credentials, git gets the token through its environment.
+    """
+    token = await run_db(get_token_by_user_id, user_id)
+    if not token or not token.get('access_token'):
+        raise RuntimeError(f"User {user_id} has no GitHub session, "
+                           "sign in again to run tasks")
+    try:
+        repo = await repo_sync.get_repository(oauth, token, repo_id)
+    except HTTPException as e:
+        raise RuntimeError(f"Repository {repo_id}: {e.detail}")
+    return repo['url'], token['access_token']
+
+
 async def get_repo_url(repo_id: int, oauth: OAuth, token: dict) -> str:
     """Get the URL for a specific repository by its ID."""
     try:
-        repos = await fetch_github_repositories(oauth, token, "all")
-        repo = next((r for r in repos if r['id'] == repo_id), None)
-        if not repo:
-            raise HTTPException(status_code=404, detail="Repository not found")
+        repo = await repo_sync.get_repository(oauth, token, repo_id)
         return repo['url']
     except Exception as e:
         print(f"Error fetching repository URL: {e}")
@@ -467,11 +688,19 @@ def oauth_config() -> OAuth:
 
 @dataclass
 class AppState:
+    oauth: OAuth
     scheduler: Optional[Any] = None
 
+    async def check_schema(self) -> None:
+        try:
+            await run_db(check_schema)
+        except Exception as e:
+            print(f"Schema check failed: {e}")
+
     def initialize_scheduler(self) -> None:
         try:
-            self.scheduler = setup_scheduler()
+            self.scheduler = setup_scheduler(
+                functools.partial(get_task_repo_url, self.oauth))
             self.scheduler.start()
         except Exception as e:
             raise RuntimeError(f"Failed to initialize scheduler: {e}")
@@ -483,8 +712,39 @@ class AppState:
             except Exception as e:
                 print(f"Error during scheduler shutdown: {e}")
 
+    async def shutdown_task_executor(self) -> None:
+        try:
+            await shutdown_task_executor()
+        except Exception as e:
+            print(f"Error during task executor shutdown: {e}")
+
+    def start_container_pool(self) -> None:
+        try:
+            start_container_pool()
+        except Exception as e:
+            print(f"Error starting container pool: {e}")
+
+    def shutdown_container_pool(self) -> None:
+        try:
+            shutdown_container_pool()
+        except Exception as e:
+            print(f"Error during container pool shutdown: {e}")
+
+    def shutdown_extraction_pool(self) -> None:
+        try:
+            shutdown_extraction_pool()
+        except Exception as e:
+            print(f"Error during extraction pool shutdown: {e}")
+
+    def shutdown_db_pool(self) -> None:
+        try:
+            shutdown_executor()
+            close_pool()
+        except Exception as e:
+            print(f"Error during database pool shutdown: {e}")
+
 
-def create_app() -> FastAPI:
+def create_app(oauth: OAuth) -> FastAPI:
     title = os.getenv("APP_TITLE")
     session_cookie = os.getenv("SESSION_COOKIE_NAME")
     middleware_secret = os.getenv("MIDDLEWARE_SECRET_KEY")
@@ -496,20 +756,28 @@ def create_app() -> FastAPI:
     if not session_cookie:
         raise ValueError("Session cookie name not provided")
 
-    app_state = AppState()
+    app_state = AppState(oauth)
 
     @asynccontextmanager
     async def lifespan(app: FastAPI):
         try:
-            # Startup: Initialize scheduler
+            # Startup: Report schema drift, warm containers, start scheduler
+            await app_state.check_schema()
+            app_state.start_container_pool()
             app_state.initialize_scheduler()
             yield
         finally:
             # Shutdown: Cleanup resources
             app_state.shutdown_scheduler()
+            await app_state.shutdown_task_executor()
+            app_state.shutdown_container_pool()
+            app_state.shutdown_extraction_pool()
+            app_state.shutdown_db_pool()
 
     app = FastAPI(title=title, lifespan=lifespan)
 
+    app.middleware("http")(limit_upload_size)
+
     app.add_middleware(SessionMiddleware,
                        secret_key=middleware_secret,
                        session_cookie=session_cookie)
@@ -521,6 +789,8 @@ async def handle_auth_callback(request: Request,
                                oauth: OAuth) -> RedirectResponse:
     try:
         session_id = await get_or_create_session(request, oauth)
+        # The session's token was just replaced, drop any stale profile
+        invalidate_cached_user(session_id)
         request.session['session_id'] = session_id
         return RedirectResponse(url='/dash')
     except Exception as e:
@@ -557,11 +827,15 @@ class TaskCreateResponse(BaseModel):
     user_id: int
     created_at: str
     scheduled_time: Optional[str]
+    status: str = "pending"
 
 
 def validate_pdf_file(file: UploadFile) -> None:
-    """Validate that the uploaded file is a PDF."""
-    if not file.filename.endswith('.pdf'):
+    """Validate that the uploaded file is named as a PDF.
+
+    The content itself is checked for the PDF header while it is saved.
+    """
+    if not file.filename or not file.filename.lower().endswith('.pdf'):
         raise HTTPException(status_code=400,
                             detail="Only PDF files are allowed")
 
@@ -578,16 +852,35 @@ def parse_scheduled_time(time_str: str) -> datetime:
         )
 
 
-def handle_task_creation(repo_id: int, task_name: str, pdf_file: UploadFile,
-                         user_id: int,
-                         scheduled_time: datetime) -> TaskCreateResponse:
+def prefill_pdf_text(upload: SavedUpload) -> None:
+    """Extract an uploaded PDF's text into the cache ahead of the task run."""
     try:
-        # Save the PDF file
-        pdf_file_path = save_pdf_file(pdf_file, user_id)
+        open_pdf_text(local_pdf_path(upload.key, upload.sha256),
+                      upload.sha256).close()
+    except Exception as e:
+        # The task run extracts the text itself if this did not work
+        print(f"Error pre-extracting PDF {upload.sha256}: {e}")
+
+
+async def handle_task_creation(
+        repo_id: int,
+        task_name: str,
+        pdf_file: UploadFile,
+        user_id: int,
+        scheduled_time: datetime,
+        background_tasks: Optional[BackgroundTasks] = None
+) -> TaskCreateResponse:
+    # Stream the PDF file to disk, rejecting oversized or non-PDF uploads
+    upload = await save_pdf_upload(pdf_file)
+
+    try:
+        # Create task in database, the stored PDF is collected if this fails
+        task = await run_db(create_task, repo_id, task_name, upload, user_id,
+                            scheduled_time)
 
-        # Create task in database
-        task = create_task(repo_id, task_name, pdf_file_path, user_id,
-                           scheduled_time)
+        # Parse the PDF after the response is sent so the task starts warm
+        if background_tasks is not None:
+            background_tasks.add_task(prefill_pdf_text, upload)
 
         return TaskCreateResponse(**task)
     except Exception as e:
@@ -597,71 +890,30 @@ def handle_task_creation(repo_id: int, task_name: str, pdf_file: UploadFile,
 async def get_repo_details_from_github(oauth: OAuth, token: dict,
                                        repo_id: int) -> dict:
     """Get repository details from GitHub API."""
-    # First get the repository's full name from the list of repositories
-    repos = await fetch_github_repositories(oauth, token, "all")
-    repo_info = next((r for r in repos if r['id'] == repo_id), None)
-    if not repo_info:
-        raise HTTPException(status_code=404, detail="Repository not found")
-
-    # Fetch repository details using the full name
-    resp = await oauth.github.get(f'repos/{repo_info["full_name"]}',
-                                  token=token)
-    if not resp or resp.status_code != 200:
-        raise HTTPException(status_code=404, detail="Repository not found")
+    return await repo_sync.get_repository(oauth, token, repo_id)
 
-    repo = resp.json()
-    return {
-        'id': repo['id'],
-        'name': repo['name'],
-        'description': repo['description'],
-        'url': repo['html_url'],
-        'stars': repo['stargazers_count'],
-        'forks': repo['forks_count'],
-        'language': repo['language'],
-        'private': repo['private'],
-        'created_at': repo['created_at'],
-        'updated_at': repo['updated_at']
-    }
-
-
-def get_repo_task_counts(repo_id: int, user_id: int) -> tuple[int, int]:
-    """Get pending and completed task counts for a repository."""
-    conn = get_db_connection()
-    cur = conn.cursor()
-    try:
-        cur.execute(
-            """
-            SELECT pending_tasks, completed_tasks
-            FROM "Repo"
-            WHERE repo_id = %s AND user_id = %s
-            """, (repo_id, user_id))
-
-        row = cur.fetchone()
-        pending_tasks_count = row[0] if row else 0
-        completed_tasks_count = row[1] if row else 0
-        return pending_tasks_count, completed_tasks_count
-    finally:
-        cur.close()
-        conn.close()
 
-
-async def get_repository_details(repo_id: int, user_id: int, oauth: OAuth,
-                                 token: dict) -> dict:
-    """Get complete repository details including tasks and counts."""
+async def get_repository_details(repo_id: int,
+                                 user_id: int,
+                                 oauth: OAuth,
+                                 token: dict,
+                                 timer: Optional[RequestTimer] = None) -> dict:
+    """Get repository details, the first page of its tasks and counts."""
+    timer = timer or RequestTimer()
     try:
-        # Get repository details from GitHub
-        repo = await get_repo_details_from_github(oauth, token, repo_id)
-
-        # Get tasks for this repository
-        tasks = get_repo_tasks(repo_id, user_id)
-
-        # Get task counts
-        pending_tasks_count, completed_tasks_count = get_repo_task_counts(
-            repo_id, user_id)
+        # The GitHub lookup and the database query are independent
+        repo, (page, pending_tasks_count,
+               completed_tasks_count) = await asyncio.gather(
+                   timer.measure(
+                       "github",
+                       get_repo_details_from_github(oauth, token, repo_id)),
+                   timer.measure(
+                       "db",
+                       run_db(get_repo_tasks_with_counts, repo_id, user_id)))
 
         return {
             "repo": repo,
-            "tasks": tasks,
+            "page": page,
             "pending_tasks_count": pending_tasks_count,
             "completed_tasks_count": completed_tasks_count
         }
@@ -2,18 +2,37 @@ from helpers import (TaskCreateResponse, create_app, get_current_user,
                      get_dashboard_data, get_language_color, format_date,
                      handle_auth_callback, handle_task_creation, oauth_config,
                      parse_scheduled_time, get_task_details, validate_pdf_file,
-                     validate_user_session, get_repository_details)
-from fastapi import Request, HTTPException, Depends, UploadFile, File, Form
-from fastapi.responses import HTMLResponse, RedirectResponse, FileResponse
+                     validate_user_session, get_repository_details,
+                     invalidate_cached_user, user_cache, cancel_running_task,
+                     get_task_row, task_event_stream, TaskPage,
+                     TASK_PAGE_SIZE, TASK_PAGE_MAX_SIZE, parse_task_filters,
+                     get_repo_tasks, get_user_tasks)
+from fastapi import (BackgroundTasks, Request, HTTPException, Depends,
+                     UploadFile, File, Form, Query)
+from typing import List, Optional
+from fastapi.responses import (HTMLResponse, RedirectResponse, FileResponse,
+                               StreamingResponse)
 from fastapi.templating import Jinja2Templates
 import uvicorn
 import os
 from dotenv import load_dotenv
-from authlib.integrations.starlette_client import OAuth
+from async_db import get_executor_stats, run_db
+from containers import get_container_pool_stats
+from db import get_pool_stats
+from git_mirror import git_mirrors
+from repo_sync import repo_sync
+from scheduler import get_scheduler_stats, get_task_executor_stats
+from storage import pdf_response
+from task_events import task_events
+from task_logs import task_logs
+from text_cache import text_cache
+from timing import RequestTimer
+from uploads import blob_key
+from workspaces import get_workspace_manager
 
 load_dotenv()
-app = create_app()
 oauth = oauth_config()
+app = create_app(oauth)
 templates = Jinja2Templates(directory="templates")
 
 
@@ -61,17 +80,33 @@ async def dash(request: Request, visibility: str = "all"):
 
 @app.get("/auth/logout")
 async def logout(request: Request):
+    invalidate_cached_user(request.session.get('session_id'))
     request.session.clear()
     return RedirectResponse(url='/')
 
 
-async def get_current_user(request: Request, oauth: OAuth) -> tuple[dict, str]:
+async def require_current_user(request: Request) -> tuple[dict, str]:
     user, token = await get_current_user(request, oauth)
     if not user or not token:
         raise HTTPException(status_code=401, detail="Not authenticated")
     return user, token
 
 
+def admin_github_ids() -> set[int]:
+    """GitHub user ids allowed to see server internals, from
+    ``ADMIN_GITHUB_IDS``."""
+    ids = os.getenv("ADMIN_GITHUB_IDS", "")
+    return {int(i) for i in ids.split(",") if i.strip()}
+
+
+async def require_admin(user_info: tuple[dict, str] = Depends(
+    require_current_user)) -> tuple[dict, str]:
+    user, _ = user_info
+    if user['id'] not in admin_github_ids():
+        raise HTTPException(status_code=403, detail="Not allowed")
+    return user_info
+
+
 async def get_authenticated_user(request: Request) -> dict:
     user, _ = await get_current_user(request, oauth)
     if not user:
@@ -81,6 +116,7 @@ async def get_authenticated_user(request: Request) -> dict:
 
 @app.post("/api/tasks", response_model=TaskCreateResponse)
 async def create_new_task(
+    background_tasks: BackgroundTasks,
     task_name: str = Form(...),
     repo_id: int = Form(...),
     pdf_file: UploadFile = File(...),
@@ -90,39 +126,75 @@ async def create_new_task(
     validate_pdf_file(pdf_file)
     scheduled_datetime = parse_scheduled_time(scheduled_time)
 
-    task = handle_task_creation(repo_id=repo_id,
-                                task_name=task_name,
-                                pdf_file=pdf_file,
-                                user_id=user['id'],
-                                scheduled_time=scheduled_datetime)
+    task = await handle_task_creation(repo_id=repo_id,
+                                      task_name=task_name,
+                                      pdf_file=pdf_file,
+                                      user_id=user['id'],
+                                      scheduled_time=scheduled_datetime,
+                                      background_tasks=background_tasks)
 
     return task
 
 
+@app.get("/api/tasks", response_model=TaskPage)
+async def list_tasks(cursor: Optional[str] = None,
+                     limit: int = Query(TASK_PAGE_SIZE,
+                                        ge=1,
+                                        le=TASK_PAGE_MAX_SIZE),
+                     status: Optional[List[str]] = Query(None),
+                     scheduled_after: Optional[str] = None,
+                     scheduled_before: Optional[str] = None,
+                     user: dict = Depends(get_authenticated_user)
+                     ) -> TaskPage:
+    """A page of the user's tasks across repositories, newest first."""
+    filters = parse_task_filters(status, scheduled_after, scheduled_before)
+    return await run_db(get_user_tasks, user['id'], filters, cursor, limit)
+
+
+@app.get("/api/repos/{repo_id}/tasks", response_model=TaskPage)
+async def list_repo_tasks(repo_id: int,
+                          cursor: Optional[str] = None,
+                          limit: int = Query(TASK_PAGE_SIZE,
+                                             ge=1,
+                                             le=TASK_PAGE_MAX_SIZE),
+                          status: Optional[List[str]] = Query(None),
+                          scheduled_after: Optional[str] = None,
+                          scheduled_before: Optional[str] = None,
+                          user: dict = Depends(get_authenticated_user)
+                          ) -> TaskPage:
+    """A page of a repository's tasks, newest first."""
+    filters = parse_task_filters(status, scheduled_after, scheduled_before)
+    return await run_db(get_repo_tasks, repo_id, user['id'], filters, cursor,
+                        limit)
+
+
 @app.get("/repo/{repo_id}")
 async def repo_details(request: Request,
                        repo_id: int,
                        user_info: tuple[dict,
-                                        str] = Depends(get_current_user)):
+                                        str] = Depends(require_current_user)):
     if not user_info[0] or not user_info[1]:
         return RedirectResponse(url='/')
 
     user, token = user_info
     try:
+        timer = RequestTimer()
         repo_data = await get_repository_details(repo_id, user['id'], oauth,
-                                                 token)
+                                                 token, timer)
 
         return templates.TemplateResponse(
             "repo_details.html", {
                 "request": request,
                 "user": user,
                 "repo": repo_data["repo"],
-                "tasks": repo_data["tasks"],
+                "page": repo_data["page"].model_dump(),
+                "page_size": TASK_PAGE_SIZE,
                 "pending_tasks_count": repo_data["pending_tasks_count"],
                 "completed_tasks_count": repo_data["completed_tasks_count"],
                 "get_language_color": get_language_color,
                 "format_date": format_date
-            })
+            },
+            headers={"Server-Timing": timer.header()})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -131,14 +203,16 @@ async def repo_details(request: Request,
 async def task_details(request: Request,
                        task_id: int,
                        user_info: tuple[dict,
-                                        str] = Depends(get_current_user)):
+                                        str] = Depends(require_current_user)):
 
     if not user_info[0] or not user_info[1]:
         return RedirectResponse(url='/')
 
     user, token = user_info
     try:
-        task = await get_task_details(task_id, user['id'], oauth, token)
+        timer = RequestTimer()
+        task = await get_task_details(task_id, user['id'], oauth, token,
+                                      timer)
 
         return templates.TemplateResponse(
             "task_details.html", {
@@ -146,7 +220,8 @@ async def task_details(request: Request,
                 "user": user,
                 "task": task,
                 "format_date": format_date
-            })
+            },
+            headers={"Server-Timing": timer.header()})
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -154,28 +229,89 @@ async def task_details(request: Request,
 
 
 @app.get("/api/tasks/{task_id}/pdf")
-async def get_task_pdf(task_id: int,
+async def get_task_pdf(request: Request,
+                       task_id: int,
                        user_info: tuple[dict,
-                                        str] = Depends(get_current_user)):
+                                        str] = Depends(require_current_user)):
 
     if not user_info[0] or not user_info[1]:
         raise HTTPException(status_code=401, detail="Not authenticated")
 
     user, token = user_info
     try:
-        task = await get_task_details(task_id, user['id'], oauth, token)
+        # The viewer issues many range requests, so skip the GitHub lookup
+        row = await run_db(get_task_row, task_id, user['id'])
+        if not row:
+            raise HTTPException(status_code=404, detail="Task not found")
 
-        if not os.path.exists(task['pdf_file_path']):
+        task_name, pdf_file_path, pdf_sha256 = row[2], row[4], row[7]
+        if pdf_sha256:
+            return await pdf_response(request, blob_key(pdf_sha256),
+                                      f"{task_name}.pdf")
+
+        if not os.path.exists(pdf_file_path):
             raise HTTPException(status_code=404, detail="PDF file not found")
 
-        return FileResponse(task['pdf_file_path'],
+        return FileResponse(pdf_file_path,
                             media_type='application/pdf',
-                            filename=f"{task['task_name']}.pdf")
+                            filename=f"{task_name}.pdf")
     except HTTPException as e:
         raise e
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/tasks/{task_id}/events")
+async def get_task_events(request: Request,
+                          task_id: int,
+                          user_info: tuple[dict,
+                                           str] = Depends(require_current_user)):
+    """Live status and log lines of a task as Server-Sent Events."""
+    if not user_info[0] or not user_info[1]:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    user, _ = user_info
+    row = await run_db(get_task_row, task_id, user['id'])
+    if not row:
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    last_event_id = (request.headers.get("last-event-id")
+                     or request.query_params.get("last_event_id"))
+    return StreamingResponse(task_event_stream(task_id, row[8], row[9],
+                                               last_event_id),
+                             media_type="text/event-stream",
+                             headers={
+                                 "Cache-Control": "no-cache",
+                                 "X-Accel-Buffering": "no"
+                             })
+
+
+@app.post("/api/tasks/{task_id}/cancel")
+async def cancel_task(task_id: int,
+                      user_info: tuple[dict,
+                                       str] = Depends(require_current_user)):
+    user, _ = user_info
+    return await cancel_running_task(task_id, user['id'])
+
+
+@app.get("/api/stats")
+async def stats(user_info: tuple[dict, str] = Depends(require_admin)):
+    """Pool, cache and worker internals, for operators in ADMIN_GITHUB_IDS."""
+    return {
+        "db_pool": get_pool_stats(),
+        "db_executor": get_executor_stats(),
+        "user_cache": user_cache.stats(),
+        "repo_sync": repo_sync.stats(),
+        "scheduler": get_scheduler_stats(),
+        "task_executor": get_task_executor_stats(),
+        "text_cache": text_cache.stats(),
+        "git_mirrors": git_mirrors.stats(),
+        "workspaces": get_workspace_manager().stats(),
+        "container_pool": get_container_pool_stats(),
+        "task_logs": task_logs.stats(),
+        "task_events": task_events.stats()
+    }
+
+
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
@@ -0,0 +1,263 @@
+"""Versioned schema migrations for the GhostDev database.
+
+Apply pending migrations with ``python migrations.py apply`` and inspect
+the current state with ``python migrations.py status``. Migrations are
+written to be safe on databases that were set up by hand before this
+module existed.
+"""
+import sys
+from dataclasses import dataclass
+from typing import Dict, List
+
+from dotenv import load_dotenv
+
+from db import get_db_connection
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    sql: str
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(
+        1, "create base tables", """
+        CREATE TABLE IF NOT EXISTS "User" (
+            user_id BIGINT PRIMARY KEY,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+        );
+
+        CREATE TABLE IF NOT EXISTS Session (
+            session_id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+            user_id BIGINT NOT NULL REFERENCES "User" (user_id),
+            token JSONB NOT NULL,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+        );
+
+        CREATE TABLE IF NOT EXISTS "Repo" (
+            repo_id BIGINT PRIMARY KEY,
+            user_id BIGINT NOT NULL REFERENCES "User" (user_id),
+            pending_tasks INTEGER NOT NULL DEFAULT 0,
+            completed_tasks INTEGER NOT NULL DEFAULT 0,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+        );
+
+        CREATE TABLE IF NOT EXISTS "Task" (
+            task_id BIGSERIAL PRIMARY KEY,
+            repo_id BIGINT NOT NULL REFERENCES "Repo" (repo_id),
+            user_id BIGINT REFERENCES "User" (user_id),
+            task_name TEXT NOT NULL,
+            pdf_file_path TEXT NOT NULL,
+            scheduled_time TIMESTAMPTZ NOT NULL,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+            task_completed BOOLEAN NOT NULL DEFAULT false
+        );
+        """),
+    Migration(
+        2, "task execution status and leases", """
+        ALTER TABLE "Task"
+            ADD COLUMN IF NOT EXISTS status TEXT NOT NULL DEFAULT 'pending',
+            ADD COLUMN IF NOT EXISTS started_at TIMESTAMPTZ,
+            ADD COLUMN IF NOT EXISTS finished_at TIMESTAMPTZ,
+            ADD COLUMN IF NOT EXISTS last_error TEXT,
+            ADD COLUMN IF NOT EXISTS claimed_by TEXT,
+            ADD COLUMN IF NOT EXISTS lease_expires_at TIMESTAMPTZ,
+            ADD COLUMN IF NOT EXISTS attempts INTEGER NOT NULL DEFAULT 0;
+
+        UPDATE "Task" SET status = 'succeeded'
+        WHERE task_completed AND status = 'pending';
+
+        ALTER TABLE "Task" DROP CONSTRAINT IF EXISTS task_status_check;
+        ALTER TABLE "Task" ADD CONSTRAINT task_status_check
+            CHECK (status IN ('pending', 'running', 'succeeded', 'failed'));
+        """),
+    Migration(
+        3, "indexes for hot queries", """
+        -- Due-task claims and the scheduler's upcoming-task scan
+        CREATE INDEX IF NOT EXISTS task_pending_scheduled_idx
+            ON "Task" (scheduled_time) WHERE status = 'pending';
+        -- Reclaiming tasks whose worker stopped renewing its lease
+        CREATE INDEX IF NOT EXISTS task_running_lease_idx
+            ON "Task" (lease_expires_at) WHERE status = 'running';
+        -- Repository and user task listings, newest first
+        CREATE INDEX IF NOT EXISTS task_repo_created_idx
+            ON "Task" (repo_id, created_at DESC);
+        CREATE INDEX IF NOT EXISTS task_user_created_idx
+            ON "Task" (user_id, created_at DESC);
+        -- Repo lookups filter on repo_id and user_id together
+        CREATE INDEX IF NOT EXISTS repo_repo_user_idx
+            ON "Repo" (repo_id, user_id);
+        -- create_session keeps one session per user; older versions could
+        -- leave several, so keep only the newest before enforcing it
+        DELETE FROM Session s
+        USING Session n
+        WHERE s.user_id = n.user_id
+          AND (s.created_at, s.session_id) < (n.created_at, n.session_id);
+        CREATE UNIQUE INDEX IF NOT EXISTS session_user_id_key
+            ON Session (user_id);
+        """),
+    Migration(
+        4, "content-addressed pdf blobs", """
+        CREATE TABLE IF NOT EXISTS "PdfBlob" (
+            sha256 TEXT PRIMARY KEY,
+            size BIGINT NOT NULL,
+            ref_count INTEGER NOT NULL DEFAULT 0,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+            last_referenced_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+        );
+
+        ALTER TABLE "Task"
+            ADD COLUMN IF NOT EXISTS pdf_sha256 TEXT
+            REFERENCES "PdfBlob" (sha256);
+
+        -- Keep PdfBlob.ref_count equal to the number of tasks using a blob,
+        -- whichever code path inserts or deletes the task
+        CREATE OR REPLACE FUNCTION pdf_blob_ref_count() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.pdf_sha256 IS NOT NULL THEN
+                UPDATE "PdfBlob" SET ref_count = ref_count - 1
+                WHERE sha256 = OLD.pdf_sha256;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.pdf_sha256 IS NOT NULL THEN
+                UPDATE "PdfBlob"
+                SET ref_count = ref_count + 1, last_referenced_at = NOW()
+                WHERE sha256 = NEW.pdf_sha256;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        DROP TRIGGER IF EXISTS task_pdf_blob_ref_count ON "Task";
+        CREATE TRIGGER task_pdf_blob_ref_count
+            AFTER INSERT OR DELETE OR UPDATE OF pdf_sha256 ON "Task"
+            FOR EACH ROW EXECUTE FUNCTION pdf_blob_ref_count();
+
+        -- Garbage collection scans for unreferenced blobs
+        CREATE INDEX IF NOT EXISTS pdf_blob_unreferenced_idx
+            ON "PdfBlob" (last_referenced_at) WHERE ref_count = 0;
+        """),
+    Migration(
+        5, "keyset pagination of task listings", """
+        -- Task listings page on (created_at, task_id), newest first; the
+        -- tiebreaker makes the order total so pages never skip or repeat
+        -- tasks created in the same microsecond
+        CREATE INDEX IF NOT EXISTS task_repo_created_id_idx
+            ON "Task" (repo_id, created_at DESC, task_id DESC);
+        CREATE INDEX IF NOT EXISTS task_user_created_id_idx
+            ON "Task" (user_id, created_at DESC, task_id DESC);
+        -- Superseded by the indexes above
+        DROP INDEX IF EXISTS task_repo_created_idx;
+        DROP INDEX IF EXISTS task_user_created_idx;
+        """),
+    Migration(
+        6, "backfill task owners", """
+        -- Tasks created before create_task stored user_id are owned by
+        -- their repository's user; the user task listing filters on it
+        UPDATE "Task" t
+        SET user_id = r.user_id
+        FROM "Repo" r
+        WHERE r.repo_id = t.repo_id AND t.user_id IS NULL;
+        """),
+]
+
+# Index name -> table, checked at startup
+EXPECTED_INDEXES: Dict[str, str] = {
+    "task_pending_scheduled_idx": "Task",
+    "task_running_lease_idx": "Task",
+    "task_repo_created_id_idx": "Task",
+    "task_user_created_id_idx": "Task",
+    "repo_repo_user_idx": "Repo",
+    "session_user_id_key": "session",
+    "pdf_blob_unreferenced_idx": "PdfBlob",
+}
+
+# Serializes concurrent `apply` runs from several hosts
+MIGRATION_LOCK_ID = 0x6768_6f73
+
+
+def _ensure_migrations_table(cur) -> None:
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+        )
+    """)
+
+
+def applied_versions() -> List[int]:
+    with get_db_connection() as conn, conn.cursor() as cur:
+        cur.execute("SELECT to_regclass('schema_migrations')")
+        if cur.fetchone()[0] is None:
+            return []
+        cur.execute("SELECT version FROM schema_migrations ORDER BY version")
+        return [row[0] for row in cur.fetchall()]
+
+
+def apply_migrations() -> List[int]:
+    """Apply pending migrations in order, each in its own transaction."""
+    applied = []
+    for migration in MIGRATIONS:
+        with get_db_connection() as conn, conn.cursor() as cur:
+            cur.execute("SELECT pg_advisory_xact_lock(%s)",
+                        (MIGRATION_LOCK_ID, ))
+            _ensure_migrations_table(cur)
+            cur.execute("SELECT 1 FROM schema_migrations WHERE version = %s",
+                        (migration.version, ))
+            if cur.fetchone() is not None:
+                continue
+
+            print(f"Applying migration {migration.version}: {migration.name}")
+            cur.execute(migration.sql)
+            cur.execute(
+                "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                (migration.version, migration.name))
+            applied.append(migration.version)
+    return applied
+
+
+def missing_indexes() -> List[str]:
+    with get_db_connection() as conn, conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT indexname FROM pg_indexes
+            WHERE schemaname = current_schema() AND indexname = ANY(%s)
+            """, (list(EXPECTED_INDEXES), ))
+        present = {row[0] for row in cur.fetchall()}
+    return [name for name in EXPECTED_INDEXES if name not in present]
+
+
+def check_schema() -> bool:
+    """Report pending migrations and missing indexes, returning True if none."""
+    pending = sorted({m.version
+                      for m in MIGRATIONS} - set(applied_versions()))
+    missing = missing_indexes()
+
+    if pending:
+        print(f"Schema check: pending migrations {pending}, "
+              "run `python migrations.py apply`")
+    for name in missing:
+        print(f"Schema check: missing index {name} on "
+              f"\"{EXPECTED_INDEXES[name]}\"")
+    return not pending and not missing
+
+
+def main():
+    load_dotenv()
+    command = sys.argv[1] if len(sys.argv) > 1 else "status"
+    if command == "apply":
+        applied = apply_migrations()
+        print(f"Applied migrations: {applied or 'none'}")
+        check_schema()
+    elif command == "status":
+        print(f"Applied migrations: {applied_versions()}")
+        if check_schema():
+            print("Schema is up to date")
+    else:
+        raise SystemExit("Usage: python migrations.py [status|apply]")
+
+
+if __name__ == "__main__":
+    main()
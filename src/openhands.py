@@ -1,99 +1,214 @@
+import asyncio
 import os
-import subprocess
-import logging
+import hashlib
+import io
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
 from pathlib import Path
-from urllib.parse import urlparse
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO
 from dotenv import load_dotenv
-import pdfplumber
-import time
-
-# Configure logging to suppress pdfplumber warnings
-logging.getLogger('pdfminer').setLevel(logging.ERROR)
+from containers import get_container_pool, openhands_command, runtime_image
+from extractors import ExtractionSettings, get_extractor
+from git_mirror import git_mirrors
+from task_logs import TaskLog, task_logs
+from task_prompt import prompt_chunk_tokens, write_task_prompt
+from text_cache import text_cache
 
 # Load environment variables from .env file
 load_dotenv()
 
 
-def get_repo_name(repo_url: str) -> str:
-    # Extract repository name from URL
-    parsed_url = urlparse(repo_url)
-    repo_name = os.path.splitext(os.path.basename(parsed_url.path))[0]
-    return repo_name
-
-
-def setup_repo_directory(repo_url: str) -> Path:
-    script_dir = Path(__file__).parent.absolute()
-    repos_dir = script_dir / "repos"
-    repo_name = get_repo_name(repo_url)
-    repo_dir = repos_dir / repo_name
-
-    # Create repos directory if it doesn't exist
-    repos_dir.mkdir(parents=True, exist_ok=True)
-
-    return repo_dir
-
-
-def clone_repository(repo_url: str, repo_dir: Path) -> None:
-    try:
-        subprocess.run(
-            ["git", "clone", repo_url, str(repo_dir)],
-            check=True,
-            capture_output=True,
-            text=True)
-    except subprocess.CalledProcessError as e:
-        raise RuntimeError(f"Failed to clone repository: {e.stderr}")
-
-
-def setup_environment(repo_dir: Path) -> None:
-    # Ensure we have an absolute path for Docker
-    absolute_repo_path = str(repo_dir.resolve())
-    os.environ["SANDBOX_VOLUMES"] = f"{absolute_repo_path}:/workspace:rw"
-    os.environ["LLM_MODEL"] = "openai/gpt-4o"
-
+async def clone_repository(repo_id: int,
+                           repo_url: str,
+                           task_id: int,
+                           log: Optional[TaskLog] = None,
+                           access_token: Optional[str] = None) -> Path:
+    """Check out a repository for one task from the local mirror cache."""
+    return await git_mirrors.checkout(repo_id,
+                                      repo_url,
+                                      task_id,
+                                      log=log,
+                                      access_token=access_token)
+
+
+@dataclass(frozen=True)
+class ExecutionSpec:
+    """Everything one OpenHands run needs, passed explicitly.
+
+    Runs never read or write process-wide environment variables, so several
+    can execute at once in one process without seeing each other's
+    workspace or credentials.
+    """
+    workspace: Path
+    llm_model: str
+    llm_api_key: str = field(repr=False)
+    # Limits, None leaves the OpenHands default
+    max_iterations: Optional[int] = None
+    max_budget_usd: Optional[float] = None
+    timeout_seconds: Optional[float] = None
+
+    def sandbox_volumes(self) -> str:
+        # Docker needs an absolute host path
+        return f"{self.workspace.resolve()}:/workspace:rw"
+
+    def env(self) -> Dict[str, str]:
+        return {
+            "SANDBOX_VOLUMES": self.sandbox_volumes(),
+            "LLM_API_KEY": self.llm_api_key,
+            "LLM_MODEL": self.llm_model,
+        }
+
+    def command(self, task: str) -> List[str]:
+        command = openhands_command(task)
+        if self.max_iterations is not None:
+            command += ["-i", str(self.max_iterations)]
+        if self.max_budget_usd is not None:
+            command += ["-b", str(self.max_budget_usd)]
+        return command
+
+
+def build_execution_spec(repo_dir: Path) -> ExecutionSpec:
     llm_api_key = os.getenv("LLM_API_KEY")
     if not llm_api_key:
         raise ValueError("LLM_API_KEY not found in environment variables")
-    os.environ["LLM_API_KEY"] = llm_api_key
-
 
-def extract_pdf_text(pdf_location: str) -> str:
+    max_iterations = os.getenv("OPENHANDS_MAX_ITERATIONS")
+    max_budget = os.getenv("OPENHANDS_MAX_BUDGET_USD")
+    timeout = os.getenv("OPENHANDS_TIMEOUT_SECONDS")
+    return ExecutionSpec(
+        workspace=repo_dir,
+        llm_model=os.getenv("LLM_MODEL", "openai/gpt-4o"),
+        llm_api_key=llm_api_key,
+        max_iterations=int(max_iterations) if max_iterations else None,
+        max_budget_usd=float(max_budget) if max_budget else None,
+        timeout_seconds=float(timeout) if timeout else None)
+
+
+def _extract_page_range(pdf_location: str, start: int, stop: int,
+                        settings: ExtractionSettings,
+                        extractor: str) -> list[str]:
+    """Worker entry point: the text of pages ``start`` to ``stop - 1``."""
+    return list(
+        get_extractor(extractor).page_texts(pdf_location, settings, start,
+                                            stop))
+
+
+_extraction_pool: Optional[ProcessPoolExecutor] = None
+
+
+def extraction_settings() -> dict:
+    return {
+        "workers": int(os.getenv("PDF_EXTRACT_WORKERS",
+                                 str(os.cpu_count() or 1))),
+        "min_pages": int(os.getenv("PDF_PARALLEL_MIN_PAGES", "16")),
+    }
+
+
+def get_extraction_pool() -> ProcessPoolExecutor:
+    global _extraction_pool
+    if _extraction_pool is None:
+        # Spawned workers do not inherit the server's threads and locks
+        _extraction_pool = ProcessPoolExecutor(
+            max_workers=extraction_settings()["workers"],
+            mp_context=multiprocessing.get_context("spawn"))
+    return _extraction_pool
+
+
+def shutdown_extraction_pool() -> None:
+    global _extraction_pool
+    if _extraction_pool is not None:
+        _extraction_pool.shutdown(wait=False, cancel_futures=True)
+        _extraction_pool = None
+
+
+def _page_ranges(page_count: int, workers: int) -> list[tuple[int, int]]:
+    # A few ranges per worker evens out pages of different complexity,
+    # while each range still pays for parsing the document only once
+    chunks = min(page_count, workers * 2)
+    size = -(-page_count // chunks)
+    return [(start, min(start + size, page_count))
+            for start in range(0, page_count, size)]
+
+
+def iter_pdf_pages(pdf_location: str,
+                   settings: ExtractionSettings = ExtractionSettings(),
+                   extractor: Optional[str] = None) -> Iterator[str]:
+    """Yield the cleaned text of each non-empty page, in order.
+
+    Pages are extracted lazily and their layout objects released before
+    the next page is read, so memory does not grow with the page count.
+    """
+    backend = get_extractor(extractor)
+    for page_text in backend.page_texts(pdf_location, settings):
+        if page_text:
+            yield page_text
+
+
+def write_pdf_text(page_texts: Iterable[str], out) -> int:
+    """Write page texts to ``out`` one per line, returning the characters
+    written.
+
+    Leading and trailing whitespace of the whole document is dropped, as
+    ``str.strip`` would, while holding at most one page in memory.
+    """
+    written = 0
+    # Whitespace that is only written if more text follows it
+    pending = ""
+    for number, page_text in enumerate(page_texts):
+        chunk = page_text if not number else "\n" + page_text
+        if not written:
+            chunk = chunk.lstrip()
+        body = chunk.rstrip()
+        if body:
+            out.write(pending + body)
+            written += len(pending) + len(body)
+            pending = chunk[len(body):]
+        elif written:
+            pending += chunk
+    return written
+
+
+def extract_pdf_text_to(out,
+                        pdf_location: str,
+                        settings: ExtractionSettings = ExtractionSettings(),
+                        parallel: Optional[bool] = None,
+                        extractor: Optional[str] = None) -> int:
+    """Write a PDF's body text to the text file ``out``, page by page.
+
+    ``extractor`` names a backend from ``extractors.EXTRACTORS`` and
+    defaults to ``PDF_EXTRACTOR``. Documents with at least
+    ``PDF_PARALLEL_MIN_PAGES`` pages are split into page ranges that are
+    extracted on a process pool, unless ``parallel`` forces one mode. Both
+    modes write exactly the same text. Pages go to ``out`` as they are
+    extracted, so memory does not grow with the document. Returns the
+    number of characters written.
+    """
     if not pdf_location:
-        return ""
+        return 0
 
     try:
-        with pdfplumber.open(pdf_location) as pdf:
-            if len(pdf.pages) == 0:
-                raise ValueError("PDF file is empty")
-
-            text = ""
-            for page in pdf.pages:
-                # Get the page dimensions
-                page_height = page.height
-
-                # Extract text with layout information
-                words = page.extract_words(keep_blank_chars=True,
-                                           x_tolerance=3,
-                                           y_tolerance=3)
-
-                # Filter out text that's likely to be header (top 10% of page) or footer (bottom 10% of page)
-                header_threshold = page_height * 0.1
-                footer_threshold = page_height * 0.9
-
-                filtered_words = [
-                    word for word in words
-                    if not (word['top'] < header_threshold
-                            or word['bottom'] > footer_threshold)
-                ]
-
-                # Sort words by their position (top to bottom, left to right)
-                filtered_words.sort(key=lambda w: (w['top'], w['x0']))
-
-                # Join the words with appropriate spacing
-                page_text = ' '.join(word['text'] for word in filtered_words)
-                if page_text:
-                    text += page_text + "\n"
-
-            return text.strip()
+        backend = get_extractor(extractor)
+        page_count = backend.page_count(pdf_location)
+        if page_count == 0:
+            raise ValueError("PDF file is empty")
+
+        config = extraction_settings()
+        if parallel is None:
+            parallel = (config["workers"] > 1
+                        and page_count >= config["min_pages"])
+
+        if not parallel:
+            return write_pdf_text(
+                iter_pdf_pages(pdf_location, settings, backend.name), out)
+
+        pool = get_extraction_pool()
+        futures = deque(
+            pool.submit(_extract_page_range, pdf_location, start, stop,
+                        settings, backend.name)
+            for start, stop in _page_ranges(page_count, config["workers"]))
+        return write_pdf_text(_range_texts(futures), out)
 
     except FileNotFoundError:
         raise FileNotFoundError(f"PDF file not found at: {pdf_location}")
@@ -101,45 +216,127 @@ def extract_pdf_text(pdf_location: str) -> str:
         raise ValueError(f"Error extracting text from PDF: {str(e)}")
 
 
-def run_docker_command(pdf_text: str) -> None:
-    """Run the docker command with the PDF text as the task."""
-    docker_cmd = [
-        "docker", "run", "-it", "--pull=always", "-e",
-        f"SANDBOX_RUNTIME_CONTAINER_IMAGE=docker.all-hands.dev/all-hands-ai/runtime:0.39-nikolaik",
-        "-e", f"SANDBOX_USER_ID={os.getuid()}", "-e",
-        f"SANDBOX_VOLUMES={os.environ['SANDBOX_VOLUMES']}", "-e",
-        f"LLM_API_KEY={os.environ['LLM_API_KEY']}", "-e",
-        f"LLM_MODEL={os.environ['LLM_MODEL']}", "-e", "LOG_ALL_EVENTS=true",
-        "-v", "/var/run/docker.sock:/var/run/docker.sock", "-v",
-        f"{os.path.expanduser('~')}/.openhands-state:/.openhands-state",
-        "--add-host", "host.docker.internal:host-gateway", "--name",
-        f"openhands-app-{int(time.time())}",
-        "docker.all-hands.dev/all-hands-ai/openhands:0.39", "python", "-m",
-        "openhands.core.main", "-t", pdf_text
-    ]
+def _range_texts(futures: "deque[Future]") -> Iterator[str]:
+    # Drops each range once written, instead of keeping every result alive
+    # until the whole document is done
+    while futures:
+        for text in futures.popleft().result():
+            if text:
+                yield text
 
-    try:
-        subprocess.run(docker_cmd, check=True)
-    except subprocess.CalledProcessError as e:
-        raise RuntimeError(f"Failed to run docker command: {str(e)}")
 
+def extract_pdf_text(pdf_location: str,
+                     settings: ExtractionSettings = ExtractionSettings(),
+                     parallel: Optional[bool] = None,
+                     extractor: Optional[str] = None) -> str:
+    """Extract a PDF's body text into a string.
+
+    Takes the same arguments as ``extract_pdf_text_to``. The whole text is
+    held in memory, task runs read it through ``open_pdf_text`` instead.
+    """
+    out = io.StringIO()
+    extract_pdf_text_to(out, pdf_location, settings, parallel, extractor)
+    return out.getvalue()
 
-def run_openhands(repo_url: str, pdf_location: str):
-    repo_dir = setup_repo_directory(repo_url)
-    clone_repository(repo_url, repo_dir)
-    setup_environment(repo_dir)
 
-    # Extract the text from the pdf
-    pdf_text = extract_pdf_text(pdf_location)
+def file_sha256(path: str) -> str:
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            hasher.update(chunk)
+    return hasher.hexdigest()
 
-    # Run the docker command with the PDF text
-    if pdf_text:
-        run_docker_command(pdf_text)
+
+def open_pdf_text(pdf_location: str,
+                  pdf_sha256: Optional[str] = None,
+                  settings: ExtractionSettings = ExtractionSettings()
+                  ) -> TextIO:
+    """Open a PDF's extracted text, reusing earlier results for the document.
+
+    The text is extracted straight into the text cache, and the caller
+    reads and closes the returned file. Hashing the file is cheap next to
+    layout analysis, so documents without a known hash are hashed here.
+    """
+    if not pdf_location:
+        return io.StringIO()
+
+    sha256 = pdf_sha256 or file_sha256(pdf_location)
+    fingerprint = settings.fingerprint(get_extractor().name)
+    text = text_cache.open(sha256, fingerprint)
+    if text is not None:
+        return text
+
+    # Concurrent callers for the same document wait for one extraction
+    with text_cache.key_lock(sha256, fingerprint):
+        # Another caller may have filled it while this one waited
+        text = text_cache.open(sha256, fingerprint, record=False)
+        if text is None:
+            text = text_cache.fill(
+                sha256, fingerprint,
+                lambda out: extract_pdf_text_to(out, pdf_location, settings))
+    return text
+
+
+async def run_docker_command(task: str,
+                             spec: ExecutionSpec,
+                             log: Optional[TaskLog] = None) -> None:
+    """Run OpenHands with ``task`` as its instruction in a warm container.
+
+    ``task`` goes on the command line, so it must stay short; the
+    specification itself is read from the workspace.
+    """
+    pool = get_container_pool()
+    env = {
+        "SANDBOX_RUNTIME_CONTAINER_IMAGE": pool.pinned_image(runtime_image()),
+        **spec.env(),
+    }
+
+    returncode = await pool.run(spec.command(task), env,
+                                spec.timeout_seconds, log)
+    if returncode != 0:
+        raise RuntimeError(
+            f"Failed to run docker command: exit status {returncode}")
+
+
+async def run_openhands(repo_id: int,
+                        task_id: int,
+                        repo_url: str,
+                        pdf_location: str,
+                        pdf_sha256: Optional[str] = None,
+                        access_token: Optional[str] = None):
+    """Run one task, streaming git and OpenHands output to its task log.
+
+    Cancelling the coroutine stops whichever process is running.
+    """
+    async with task_logs.open(task_id) as log:
+        repo_dir = await clone_repository(repo_id, repo_url, task_id, log,
+                                          access_token)
+        spec = build_execution_spec(repo_dir)
+
+        # Extract the text from the pdf
+        pdf_text = await asyncio.to_thread(open_pdf_text, pdf_location,
+                                           pdf_sha256)
+        with pdf_text:
+            # Hand the PDF text over through files in the workspace, argv
+            # limits a single argument to 128 KiB and exposes it in ps
+            prompt = await asyncio.to_thread(write_task_prompt, repo_dir,
+                                             pdf_text, prompt_chunk_tokens())
+        if not prompt.chars:
+            raise RuntimeError("No text could be extracted from the PDF")
+        log.append("ghostdev", f"Specification written to {prompt.entry} "
+                   f"({prompt.chars} characters, {len(prompt.parts)} "
+                   f"part(s))")
+        await run_docker_command(prompt.instruction(), spec, log)
 
 
 def main():
-    run_openhands("https://github.com/AlexsanderHamir/prof.git",
-                  "uploads/98370540/721dbd93-32a1-4d1e-b6c3-15922910a978.pdf")
+    asyncio.run(
+        run_openhands(
+            repo_id=0,
+            task_id=0,
+            repo_url="https://github.com/AlexsanderHamir/prof.git",
+            pdf_location=
+            "uploads/98370540/721dbd93-32a1-4d1e-b6c3-15922910a978.pdf"))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,206 @@
+import asyncio
+import hashlib
+import os
+import time
+import weakref
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from authlib.integrations.starlette_client import OAuth
+from fastapi import HTTPException
+
+from cache import TTLCache
+
+
+def format_repository(repo: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'id': repo['id'],
+        'full_name': repo['full_name'],
+        'name': repo['name'],
+        'description': repo['description'],
+        'url': repo['html_url'],
+        'stars': repo['stargazers_count'],
+        'forks': repo['forks_count'],
+        'language': repo['language'],
+        'private': repo['private'],
+        'created_at': repo['created_at'],
+        'updated_at': repo['updated_at']
+    }
+
+
+@dataclass
+class RepoPage:
+    repos: List[Dict[str, Any]]
+    has_next: bool
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+@dataclass
+class UserRepos:
+    pages: List[RepoPage] = field(default_factory=list)
+    repos: List[Dict[str, Any]] = field(default_factory=list)
+    synced_at: float = 0.0
+    # Index over ``repos``, rebuilt on every sync
+    by_id: Dict[int, Dict[str, Any]] = field(default_factory=dict)
+    # Single repositories fetched by id on an index miss, with fetch time
+    lookups: Dict[int, tuple] = field(default_factory=dict)
+
+
+class RepoSync:
+    """Per-user cache of the full ``user/repos`` listing.
+
+    Listings are refreshed at most once every ``ttl`` seconds. A refresh
+    walks every page and revalidates pages already seen with
+    ``If-None-Match``/``If-Modified-Since``, so unchanged pages come back as
+    304s, which GitHub does not count against the rate limit.
+
+    Each listing is indexed by repository id. ``get_repository`` answers
+    from that index and falls back to a single ``repositories/{id}`` call.
+    """
+
+    def __init__(self,
+                 ttl: float = 60.0,
+                 per_page: int = 100,
+                 max_users: int = 1024,
+                 max_age: float = 86400.0):
+        self.ttl = ttl
+        self.per_page = per_page
+        self._entries = TTLCache(maxsize=max_users, ttl=max_age)
+        self._locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = (
+            weakref.WeakValueDictionary())
+        self.syncs = 0
+        self.pages_fetched = 0
+        self.pages_not_modified = 0
+        self.index_hits = 0
+        self.index_misses = 0
+
+    @staticmethod
+    def cache_key(token: dict) -> str:
+        access_token = token.get('access_token', '') if isinstance(
+            token, dict) else str(token)
+        return hashlib.sha256(access_token.encode()).hexdigest()
+
+    def _lock_for(self, key: str) -> asyncio.Lock:
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[key] = lock
+        return lock
+
+    def _is_fresh(self, entry: Optional[UserRepos]) -> bool:
+        return entry is not None and time.monotonic() - entry.synced_at < self.ttl
+
+    async def get_repository(self, oauth: OAuth, token: dict,
+                             repo_id: int) -> Dict[str, Any]:
+        """Return one repository by id, making at most one GitHub call."""
+        key = self.cache_key(token)
+        entry = self._entries.get(key)
+        if entry is not None:
+            if self._is_fresh(entry) and repo_id in entry.by_id:
+                self.index_hits += 1
+                return entry.by_id[repo_id]
+
+            looked_up = entry.lookups.get(repo_id)
+            if looked_up and time.monotonic() - looked_up[1] < self.ttl:
+                self.index_hits += 1
+                return looked_up[0]
+
+        self.index_misses += 1
+        resp = await oauth.github.get(f'repositories/{repo_id}', token=token)
+        if not resp or resp.status_code != 200:
+            raise HTTPException(status_code=404, detail="Repository not found")
+
+        repo = format_repository(resp.json())
+        if entry is None:
+            # Keep the lookup without marking the listing as synced
+            entry = UserRepos()
+            self._entries.set(key, entry)
+        entry.lookups[repo_id] = (repo, time.monotonic())
+        return repo
+
+    async def get_repositories(self, oauth: OAuth,
+                               token: dict) -> List[Dict[str, Any]]:
+        """Return every repository visible to the token's user."""
+        key = self.cache_key(token)
+        entry = self._entries.get(key)
+        if self._is_fresh(entry):
+            return entry.repos
+
+        async with self._lock_for(key):
+            # Another request may have refreshed while we waited
+            entry = self._entries.get(key)
+            if self._is_fresh(entry):
+                return entry.repos
+
+            entry = await self._sync(oauth, token, entry or UserRepos())
+            self._entries.set(key, entry)
+            return entry.repos
+
+    async def _fetch_page(self, oauth: OAuth, token: dict, number: int,
+                          previous: Optional[RepoPage]) -> RepoPage:
+        headers = {}
+        if previous is not None:
+            if previous.etag:
+                headers['If-None-Match'] = previous.etag
+            if previous.last_modified:
+                headers['If-Modified-Since'] = previous.last_modified
+
+        resp = await oauth.github.get('user/repos',
+                                      token=token,
+                                      params={
+                                          'per_page': self.per_page,
+                                          'page': number
+                                      },
+                                      headers=headers)
+        if resp is not None and resp.status_code == 304 and previous:
+            self.pages_not_modified += 1
+            return previous
+        if not resp or resp.status_code != 200:
+            raise HTTPException(
+                status_code=400,
+                detail="Failed to fetch repositories from GitHub")
+
+        self.pages_fetched += 1
+        return RepoPage(repos=[format_repository(r) for r in resp.json()],
+                        has_next='next' in resp.links,
+                        etag=resp.headers.get('ETag'),
+                        last_modified=resp.headers.get('Last-Modified'))
+
+    async def _sync(self, oauth: OAuth, token: dict,
+                    entry: UserRepos) -> UserRepos:
+        self.syncs += 1
+        pages = []
+        number = 1
+        while True:
+            previous = entry.pages[number -
+                                   1] if number <= len(entry.pages) else None
+            page = await self._fetch_page(oauth, token, number, previous)
+            pages.append(page)
+            if not page.has_next:
+                break
+            number += 1
+
+        repos = [repo for page in pages for repo in page.repos]
+        return UserRepos(pages=pages,
+                         repos=repos,
+                         synced_at=time.monotonic(),
+                         by_id={repo['id']: repo
+                                for repo in repos})
+
+    def invalidate(self, token: dict) -> None:
+        self._entries.invalidate(self.cache_key(token))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "users": self._entries.stats(),
+            "syncs": self.syncs,
+            "pages_fetched": self.pages_fetched,
+            "pages_not_modified": self.pages_not_modified,
+            "index_hits": self.index_hits,
+            "index_misses": self.index_misses,
+        }
+
+
+repo_sync = RepoSync(ttl=float(os.getenv("REPO_SYNC_TTL", "60")),
+                     max_users=int(os.getenv("REPO_SYNC_MAX_USERS", "1024")))
@@ -1,71 +1,664 @@
+import asyncio
+import heapq
+import json
+import os
+import select
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Awaitable, Callable, Optional, Tuple
+
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
-from db import get_db_connection
+from async_db import run_db
+from db import get_db_connection, get_dedicated_connection
+from executor import (FAILED, PENDING, RUNNING, SUCCEEDED, DueTask,
+                      TaskExecutor, executor_settings)
+from openhands import run_openhands
+from task_events import task_events
+from uploads import collect_pdf_garbage, local_pdf_path
+from workspaces import get_workspace_manager
 
+# Identifies this process in Task.claimed_by
+WORKER_ID = os.getenv(
+    "WORKER_ID", f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}")
+LEASE_SECONDS = int(os.getenv("TASK_LEASE_SECONDS", "60"))
+# Claims before a task whose worker keeps dying is failed instead
+MAX_ATTEMPTS = int(os.getenv("TASK_MAX_ATTEMPTS", "3"))
+RECONCILE_SECONDS = int(os.getenv("SCHEDULER_RECONCILE_SECONDS", "60"))
+WORKSPACE_QUOTA_CHECK_SECONDS = int(
+    os.getenv("WORKSPACE_QUOTA_CHECK_SECONDS", "300"))
+# Postgres channel create_task notifies on, payload is JSON
+TASK_CHANNEL = "task_scheduled"
+# Postgres channel for status transitions, so every replica can push them
+# to the task's live viewers
+TASK_STATUS_CHANNEL = "task_status"
+# NOTIFY payloads are limited to 8000 bytes
+MAX_NOTIFY_ERROR_CHARS = 1000
+# Waiting slightly past scheduled_time absorbs clock skew with the database
+WAKE_GRACE_SECONDS = 0.25
 
-async def execute_due_tasks():
-    try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-
-        cur.execute("""
-            SELECT t.task_id, t.task_name, t.repo_id, r.user_id, t.pdf_file_path
-            FROM "Task" t
-            JOIN "Repo" r ON t.repo_id = r.repo_id
-            WHERE t.scheduled_time <= NOW()
-            AND t.task_completed = false
-        """)
-
-        due_tasks = cur.fetchall()
-
-        for task in due_tasks:
-            task_id, task_name, repo_id, user_id, pdf_file_path = task
-            print(
-                f"Executing task {task_id}: {task_name} for PDF: {pdf_file_path}"
-            )
+# Returns the clone URL and access token of (repo_id, user_id), set by
+# setup_scheduler
+RepoUrlResolver = Callable[[int, int], Awaitable[Tuple[str, str]]]
+
+task_executor: Optional[TaskExecutor] = None
+repo_url_resolver: Optional[RepoUrlResolver] = None
+task_scheduler: Optional["TaskScheduler"] = None
+task_wakeup: Optional["TaskWakeup"] = None
 
-            execute_task_in_container(repo_id, pdf_file_path)
 
+def claim_due_tasks(limit: int) -> list[DueTask]:
+    """Atomically lease up to ``limit`` due tasks to this worker.
+
+    Pending tasks and running tasks whose lease expired (their worker died)
+    are both claimable. SKIP LOCKED lets concurrent workers claim disjoint
+    sets of rows instead of blocking on, or double-claiming, the same ones.
+    """
+    with get_db_connection() as conn, conn.cursor() as cur:
+        cur.execute(
+            """
+            UPDATE "Task" t
+            SET status = 'running',
+                claimed_by = %s,
+                lease_expires_at = NOW() + make_interval(secs => %s),
+                started_at = NOW(),
+                attempts = t.attempts + 1
+            FROM (
+                SELECT task_id
+                FROM "Task"
+                WHERE scheduled_time <= NOW()
+                AND (status = 'pending'
+                     OR (status = 'running' AND lease_expires_at < NOW()))
+                AND attempts < %s
+                ORDER BY scheduled_time
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            ) due, "Repo" r
+            WHERE t.task_id = due.task_id
+            AND r.repo_id = t.repo_id
+            RETURNING t.task_id, t.task_name, t.repo_id, r.user_id, t.pdf_file_path,
+                      t.pdf_sha256
+        """, (WORKER_ID, LEASE_SECONDS, MAX_ATTEMPTS, limit))
+        tasks = [DueTask(*row) for row in cur.fetchall()]
+        if tasks:
             cur.execute(
-                """
+                "SELECT pg_notify(%s, payload) FROM unnest(%s::text[]) payload",
+                (TASK_STATUS_CHANNEL, [
+                    task_status_payload(task.task_id, RUNNING, None)
+                    for task in tasks
+                ]))
+        return tasks
+
+
+def fail_exhausted_tasks() -> list[tuple[int, str]]:
+    """Fail tasks whose lease expired on their last allowed attempt.
+
+    A task that crashes or hangs every worker it runs on would otherwise be
+    reclaimed forever. Returns the failed task ids with their error.
+    """
+    error = (f"Gave up after {MAX_ATTEMPTS} attempts, the worker running it "
+             "stopped renewing its lease")
+    with get_db_connection() as conn, conn.cursor() as cur:
+        cur.execute(
+            """
+            WITH failed AS (
                 UPDATE "Task"
-                SET task_completed = true
-                WHERE task_id = %s
-            """, (task_id, ))
+                SET status = 'failed',
+                    finished_at = NOW(),
+                    last_error = %s,
+                    lease_expires_at = NULL
+                WHERE status = 'running'
+                AND lease_expires_at < NOW()
+                AND attempts >= %s
+                RETURNING task_id, repo_id
+            ), counts AS (
+                UPDATE "Repo" r
+                SET pending_tasks = r.pending_tasks - f.n
+                FROM (SELECT repo_id, COUNT(*) AS n FROM failed
+                      GROUP BY repo_id) f
+                WHERE r.repo_id = f.repo_id
+            )
+            SELECT task_id FROM failed
+        """, (error, MAX_ATTEMPTS))
+        task_ids = [row[0] for row in cur.fetchall()]
+        if task_ids:
+            cur.execute(
+                "SELECT pg_notify(%s, payload) FROM unnest(%s::text[]) payload",
+                (TASK_STATUS_CHANNEL, [
+                    task_status_payload(task_id, FAILED, error)
+                    for task_id in task_ids
+                ]))
+        return [(task_id, error) for task_id in task_ids]
+
+
+def fetch_upcoming_tasks(horizon: int) -> list[tuple[int, datetime]]:
+    """Return claimable tasks that become due within ``horizon`` seconds."""
+    with get_db_connection() as conn, conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT task_id, scheduled_time
+            FROM "Task"
+            WHERE status = 'pending'
+            AND scheduled_time <= NOW() + make_interval(secs => %s)
+            UNION ALL
+            SELECT task_id, lease_expires_at
+            FROM "Task"
+            WHERE status = 'running'
+            AND lease_expires_at <= NOW() + make_interval(secs => %s)
+        """, (horizon, horizon))
+        return cur.fetchall()
+
 
-            # Update repository task counts
+def renew_leases(task_ids: list[int]) -> list[int]:
+    """Extend this worker's leases, returning the task ids it still holds."""
+    with get_db_connection() as conn, conn.cursor() as cur:
+        cur.execute(
+            """
+            UPDATE "Task"
+            SET lease_expires_at = NOW() + make_interval(secs => %s)
+            WHERE task_id = ANY(%s)
+            AND claimed_by = %s
+            AND status = 'running'
+            RETURNING task_id
+        """, (LEASE_SECONDS, task_ids, WORKER_ID))
+        return [row[0] for row in cur.fetchall()]
+
+
+def record_task_status(task: DueTask, status: str,
+                       error: Optional[str]) -> None:
+    with get_db_connection() as conn, conn.cursor() as cur:
+        # Only the lease holder may finish the task
+        cur.execute(
+            """
+            UPDATE "Task"
+            SET status = %s,
+                task_completed = %s,
+                finished_at = NOW(),
+                last_error = %s,
+                lease_expires_at = NULL
+            WHERE task_id = %s AND claimed_by = %s AND status = 'running'
+        """, (status, status == SUCCEEDED, error, task.task_id, WORKER_ID))
+        if cur.rowcount == 0:
+            print(f"Task {task.task_id} lease was lost, not recording {status}")
+            return
+
+        cur.execute("SELECT pg_notify(%s, %s)",
+                    (TASK_STATUS_CHANNEL,
+                     task_status_payload(task.task_id, status, error)))
+
+        # Update repository task counts
+        if status == SUCCEEDED:
             cur.execute(
                 """
                 UPDATE "Repo"
                 SET pending_tasks = pending_tasks - 1,
                     completed_tasks = completed_tasks + 1
                 WHERE repo_id = %s AND user_id = %s
-            """, (repo_id, user_id))
+            """, (task.repo_id, task.user_id))
+        elif status == FAILED:
+            cur.execute(
+                """
+                UPDATE "Repo"
+                SET pending_tasks = pending_tasks - 1
+                WHERE repo_id = %s AND user_id = %s
+            """, (task.repo_id, task.user_id))
+
+
+def release_task(task: DueTask) -> None:
+    """Give a claimed task back, for a worker that is shutting down."""
+    with get_db_connection() as conn, conn.cursor() as cur:
+        # The interrupted run does not count towards MAX_ATTEMPTS
+        cur.execute(
+            """
+            UPDATE "Task"
+            SET status = 'pending',
+                claimed_by = NULL,
+                lease_expires_at = NULL,
+                started_at = NULL,
+                attempts = GREATEST(attempts - 1, 0)
+            WHERE task_id = %s AND claimed_by = %s AND status = 'running'
+            RETURNING scheduled_time
+        """, (task.task_id, WORKER_ID))
+        row = cur.fetchone()
+        if row is None:
+            print(f"Task {task.task_id} lease was lost, not releasing it")
+            return
+
+        # Other replicas claim it right away instead of at their next poll
+        cur.execute("SELECT pg_notify(%s, %s)",
+                    (TASK_CHANNEL, task_notification_payload(
+                        task.task_id, row[0])))
+        cur.execute("SELECT pg_notify(%s, %s)",
+                    (TASK_STATUS_CHANNEL,
+                     task_status_payload(task.task_id, PENDING, None)))
+
+
+async def on_task_status(task: DueTask, status: str,
+                         error: Optional[str]) -> None:
+    if error:
+        print(f"Task {task.task_id} {status}: {error}")
+    else:
+        print(f"Task {task.task_id} {status}")
 
-        conn.commit()
-        cur.close()
-        conn.close()
+    # The claim already moved the task to running
+    if status == PENDING:
+        await run_db(release_task, task)
+    elif status != RUNNING:
+        await run_db(record_task_status, task, status, error)
+        # A slot just freed up for tasks that were due but not claimed
+        if task_wakeup is not None:
+            task_wakeup.capacity_available()
 
+    # After recording, so a viewer reloading the page sees the same status
+    task_events.publish_status(task.task_id, status, error)
+
+
+async def run_due_task(task: DueTask) -> None:
+    print(
+        f"Executing task {task.task_id}: {task.task_name} for PDF: {task.pdf_file_path}"
+    )
+    if repo_url_resolver is None:
+        raise RuntimeError("Scheduler has no repository URL resolver")
+    repo_url, access_token = await repo_url_resolver(task.repo_id,
+                                                     task.user_id)
+    # May download the PDF from object storage
+    pdf_path = await asyncio.to_thread(local_pdf_path, task.pdf_file_path,
+                                       task.pdf_sha256)
+    await run_openhands(task.repo_id,
+                        task.task_id,
+                        repo_url,
+                        pdf_path,
+                        task.pdf_sha256,
+                        access_token=access_token)
+
+
+def get_task_executor() -> TaskExecutor:
+    global task_executor
+    if task_executor is None:
+        task_executor = TaskExecutor(run_due_task, on_task_status,
+                                     **executor_settings())
+    return task_executor
+
+
+async def execute_due_tasks() -> bool:
+    """Claim and submit due tasks, returning whether more may be waiting."""
+    executor = get_task_executor()
+    capacity = executor.capacity()
+    if capacity == 0:
+        return True
+
+    try:
+        for task_id, error in await run_db(fail_exhausted_tasks):
+            print(f"Task {task_id} {FAILED}: {error}")
+            task_events.publish_status(task_id, FAILED, error)
+        due_tasks = await run_db(claim_due_tasks, capacity)
     except Exception as e:
-        print(f"Error executing due tasks: {e}")
-        if 'conn' in locals():
-            conn.rollback()
-            conn.close()
+        print(f"Error claiming due tasks: {e}")
+        return False
+
+    for task in due_tasks:
+        executor.submit(task)
+    return len(due_tasks) == capacity
+
+
+class TaskWakeup:
+    """Sleep until the next known scheduled_time instead of polling.
+
+    Upcoming tasks are kept in a min-heap. ``schedule`` may be called from
+    any thread; it wakes the loop when the new task is due sooner than the
+    current head. When the head is due the loop claims through
+    ``execute_due_tasks``, so the database stays the source of truth and
+    the heap only decides when to look.
+    """
+
+    def __init__(self):
+        self._heap: list[tuple[float, int]] = []
+        # Latest wake time per task id; older heap entries are skipped
+        self._pending: dict[int, float] = {}
+        self._event = asyncio.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._backlog = False
+        self.wakeups = 0
+        self.dispatches = 0
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._task = self._loop.create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def schedule(self, task_id: int, when: datetime) -> None:
+        if self._loop is None:
+            return
+        self._loop.call_soon_threadsafe(self._push, task_id, when.timestamp())
+
+    def capacity_available(self) -> None:
+        if self._loop is not None and self._backlog:
+            self._loop.call_soon_threadsafe(self._event.set)
+
+    def _push(self, task_id: int, when: float) -> None:
+        if self._pending.get(task_id) == when:
+            return
+        self._pending[task_id] = when
+        heapq.heappush(self._heap, (when, task_id))
+        if self._heap[0] == (when, task_id):
+            self._event.set()
+
+    def _pop_due(self) -> int:
+        now = time.time()
+        due = 0
+        while self._heap and self._heap[0][0] + WAKE_GRACE_SECONDS <= now:
+            when, task_id = heapq.heappop(self._heap)
+            if self._pending.get(task_id) == when:
+                del self._pending[task_id]
+                due += 1
+        return due
+
+    def _timeout(self) -> Optional[float]:
+        if not self._heap:
+            return None
+        return max(0.0,
+                   self._heap[0][0] + WAKE_GRACE_SECONDS - time.time())
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._event.wait(), self._timeout())
+            except asyncio.TimeoutError:
+                pass
+            self._event.clear()
+            self.wakeups += 1
+
+            if self._pop_due() or self._backlog:
+                self.dispatches += 1
+                self._backlog = await execute_due_tasks()
+
+    def stats(self) -> dict:
+        return {
+            "upcoming": len(self._pending),
+            "next_due_in": self._timeout(),
+            "wakeups": self.wakeups,
+            "dispatches": self.dispatches,
+            "backlog": self._backlog,
+        }
+
+
+class TaskListener:
+    """Forward Postgres NOTIFYs on TASK_CHANNEL to a TaskWakeup.
+
+    Status transitions of tasks run by other workers, notified on
+    TASK_STATUS_CHANNEL, are published to ``task_events``.
+
+    Runs on its own thread with a dedicated connection, reconnecting on
+    failure; the reconciliation poll covers anything missed meanwhile.
+    """
+
+    def __init__(self, wakeup: TaskWakeup, on_reconnect=None):
+        self.wakeup = wakeup
+        self.on_reconnect = on_reconnect
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.notifications = 0
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run,
+                                        name="task-listener",
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    def _run(self) -> None:
+        connected_before = False
+        while not self._stop.is_set():
+            try:
+                conn = get_dedicated_connection()
+            except Exception as e:
+                print(f"Task listener failed to connect: {e}")
+                self._stop.wait(5)
+                continue
+
+            try:
+                conn.autocommit = True
+                with conn.cursor() as cur:
+                    cur.execute(f"LISTEN {TASK_CHANNEL}")
+                    cur.execute(f"LISTEN {TASK_STATUS_CHANNEL}")
+                if connected_before and self.on_reconnect is not None:
+                    self.on_reconnect()
+                connected_before = True
+
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], 5) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        if notify.channel == TASK_STATUS_CHANNEL:
+                            self._handle_status(notify.payload)
+                        else:
+                            self._handle(notify.payload)
+            except Exception as e:
+                print(f"Task listener error: {e}")
+                self._stop.wait(1)
+            finally:
+                conn.close()
+
+    def _handle(self, payload: str) -> None:
+        self.notifications += 1
+        try:
+            data = json.loads(payload)
+            self.wakeup.schedule(int(data["task_id"]),
+                                 datetime.fromisoformat(data["scheduled_time"]))
+        except (KeyError, ValueError, TypeError) as e:
+            print(f"Ignoring malformed task notification {payload!r}: {e}")
+
+    def _handle_status(self, payload: str) -> None:
+        self.notifications += 1
+        try:
+            data = json.loads(payload)
+            # This worker published its own transitions directly
+            if data["worker_id"] != WORKER_ID:
+                task_events.publish_status(int(data["task_id"]),
+                                           data["status"], data["error"])
+        except (KeyError, ValueError, TypeError) as e:
+            print(f"Ignoring malformed status notification {payload!r}: {e}")
+
+
+async def reconcile_upcoming_tasks() -> None:
+    """Slow fallback poll that refills the wakeup heap from the database."""
+    if task_wakeup is None:
+        return
+
+    try:
+        upcoming = await run_db(fetch_upcoming_tasks, RECONCILE_SECONDS * 2)
+    except Exception as e:
+        print(f"Error reconciling upcoming tasks: {e}")
+        return
+
+    for task_id, when in upcoming:
+        task_wakeup.schedule(task_id, when)
+
+
+async def collect_pdf_garbage_job() -> None:
+    try:
+        await run_db(collect_pdf_garbage)
+    except Exception as e:
+        print(f"Error collecting unreferenced PDFs: {e}")
+
+
+async def enforce_workspace_quota_job() -> None:
+    local_task_ids = task_executor.task_ids() if task_executor else []
+    try:
+        await run_db(get_workspace_manager().enforce, local_task_ids)
+    except Exception as e:
+        print(f"Error enforcing workspace quota: {e}")
+
+
+def notify_task_scheduled(task_id: int, scheduled_time: datetime) -> None:
+    """Wake this process's scheduler for a task created here.
+
+    Other replicas learn about it through the NOTIFY sent by create_task.
+    """
+    if task_wakeup is not None:
+        task_wakeup.schedule(task_id, scheduled_time)
+
+
+def task_notification_payload(task_id: int, scheduled_time: datetime) -> str:
+    return json.dumps({
+        "task_id": task_id,
+        "scheduled_time": scheduled_time.isoformat()
+    })
+
+
+def task_status_payload(task_id: int, status: str,
+                        error: Optional[str]) -> str:
+    if error and len(error) > MAX_NOTIFY_ERROR_CHARS:
+        error = error[:MAX_NOTIFY_ERROR_CHARS] + "..."
+    return json.dumps({
+        "task_id": task_id,
+        "status": status,
+        "error": error,
+        "worker_id": WORKER_ID
+    })
+
+
+async def heartbeat_leases():
+    if task_executor is None:
+        return
+
+    task_ids = task_executor.task_ids()
+    if not task_ids:
+        return
+
+    try:
+        held = set(await run_db(renew_leases, task_ids))
+    except Exception as e:
+        print(f"Error renewing task leases: {e}")
+        return
+
+    # Another worker reclaimed these after our lease expired
+    for task_id in set(task_ids) - held:
+        print(f"Task {task_id} lease was lost, cancelling local run")
+        task_executor.cancel(task_id)
+
+
+class TaskScheduler:
+    """Event-driven due-task scheduler.
+
+    Combines the wakeup heap, the NOTIFY listener and an APScheduler
+    instance for the periodic jobs (reconciliation, lease heartbeats, PDF
+    garbage collection and the workspace quota).
+    """
+
+    def __init__(self):
+        self.jobs = AsyncIOScheduler()
+        self.wakeup = TaskWakeup()
+        self.listener = TaskListener(self.wakeup,
+                                     on_reconnect=self._reconcile_soon)
+
+        self.jobs.add_job(reconcile_upcoming_tasks,
+                          trigger=IntervalTrigger(seconds=RECONCILE_SECONDS),
+                          id='reconcile_upcoming_tasks',
+                          replace_existing=True,
+                          max_instances=1,
+                          coalesce=True,
+                          next_run_time=datetime.now())
+
+        self.jobs.add_job(heartbeat_leases,
+                          trigger=IntervalTrigger(
+                              seconds=max(1, LEASE_SECONDS // 3)),
+                          id='heartbeat_leases',
+                          replace_existing=True,
+                          max_instances=1,
+                          coalesce=True)
+
+        self.jobs.add_job(collect_pdf_garbage_job,
+                          trigger=IntervalTrigger(hours=1),
+                          id='collect_pdf_garbage',
+                          replace_existing=True,
+                          max_instances=1,
+                          coalesce=True)
+
+        self.jobs.add_job(enforce_workspace_quota_job,
+                          trigger=IntervalTrigger(
+                              seconds=WORKSPACE_QUOTA_CHECK_SECONDS),
+                          id='enforce_workspace_quota',
+                          replace_existing=True,
+                          max_instances=1,
+                          coalesce=True)
+
+    def _reconcile_soon(self) -> None:
+        self.jobs.modify_job('reconcile_upcoming_tasks',
+                             next_run_time=datetime.now())
+
+    def start(self) -> None:
+        global task_scheduler, task_wakeup
+        task_scheduler, task_wakeup = self, self.wakeup
+        self.wakeup.start()
+        self.jobs.start()
+        self.listener.start()
+
+    def shutdown(self) -> None:
+        global task_scheduler, task_wakeup
+        self.listener.stop()
+        self.jobs.shutdown()
+        self.wakeup.stop()
+        task_scheduler, task_wakeup = None, None
+
+    def stats(self) -> dict:
+        return {
+            **self.wakeup.stats(),
+            "notifications": self.listener.notifications,
+        }
+
+
+def setup_scheduler(resolve_repo_url: RepoUrlResolver) -> TaskScheduler:
+    """Set up the scheduler that starts tasks as they become due.
+
+    ``resolve_repo_url`` gives the clone URL of a task's repository and the
+    token to clone it with.
+    """
+    global repo_url_resolver
+    repo_url_resolver = resolve_repo_url
+    return TaskScheduler()
+
+
+def cancel_task(task_id: int) -> bool:
+    """Cancel a task queued or running in this process."""
+    return task_executor is not None and task_executor.cancel(task_id)
 
 
-def setup_scheduler():
-    """Set up the scheduler to check for due tasks every minute."""
-    scheduler = AsyncIOScheduler()
+def get_scheduler_stats() -> dict:
+    if task_scheduler is None:
+        return {"initialized": False}
+    return {"initialized": True, **task_scheduler.stats()}
 
-    # Add the job to check for due tasks every minute
-    scheduler.add_job(execute_due_tasks,
-                      trigger=IntervalTrigger(seconds=10),
-                      id='check_due_tasks',
-                      replace_existing=True)
 
-    return scheduler
+def get_task_executor_stats() -> dict:
+    if task_executor is None:
+        return {"initialized": False}
+    return {
+        "initialized": True,
+        "worker_id": WORKER_ID,
+        "lease_seconds": LEASE_SECONDS,
+        "max_attempts": MAX_ATTEMPTS,
+        **task_executor.stats()
+    }
 
 
-def execute_task_in_container(repo_url: str, pdf_text: str) -> None:
-    """Execute the task in a Docker container."""
-    pass
+async def shutdown_task_executor() -> None:
+    global task_executor
+    if task_executor is not None:
+        await task_executor.shutdown()
+        task_executor = None
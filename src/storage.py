@@ -0,0 +1,347 @@
+import asyncio
+import os
+import re
+import time
+from abc import ABC, abstractmethod
+from typing import Iterator, Optional, Tuple
+from urllib.parse import quote
+
+from fastapi import HTTPException, Request
+from fastapi.responses import RedirectResponse, StreamingResponse
+
+STREAM_CHUNK_SIZE = 256 * 1024
+# Characters that cannot appear in a quoted-string header parameter
+_UNSAFE_FILENAME_RE = re.compile(r'[^\x20-\x7e]|["\\]')
+
+
+def content_disposition(filename: str, disposition: str = "inline") -> str:
+    """A ``Content-Disposition`` value for any user-supplied file name.
+
+    Headers are latin-1, so the name goes in RFC 5987 ``filename*`` and
+    an ASCII-only ``filename`` is kept for clients that ignore it.
+    """
+    fallback = _UNSAFE_FILENAME_RE.sub("_", filename)
+    value = f'{disposition}; filename="{fallback}"'
+    if fallback != filename:
+        value += f"; filename*=utf-8''{quote(filename, safe='')}"
+    return value
+
+
+class PdfStorage(ABC):
+    """Interface for where stored PDFs live.
+
+    Keys are relative paths such as ``blobs/ab/<sha256>.pdf``.
+    """
+    # Whether the files under ``local_dir`` are copies that can be fetched
+    # again, rather than the stored objects themselves
+    local_is_cache = False
+
+    @abstractmethod
+    def put_file(self, key: str, path: str) -> bool:
+        """Store the local file at ``path`` under ``key``.
+
+        If ``key`` already exists the existing object is kept and marked as
+        recently written, and False is returned. The local file is consumed
+        either way.
+        """
+
+    @abstractmethod
+    def size(self, key: str) -> int:
+        """Size of the object in bytes, raising FileNotFoundError if absent."""
+
+    @abstractmethod
+    def iter_range(self, key: str, start: int, end: int) -> Iterator[bytes]:
+        """Yield the bytes of ``key`` from ``start`` to ``end`` inclusive."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    def list_keys(self, prefix: str) -> Iterator[Tuple[str, float]]:
+        """Yield ``(key, last_modified)`` for every object under ``prefix``."""
+
+    @abstractmethod
+    def local_path(self, key: str) -> str:
+        """Return a local file path with the object's content."""
+
+    @abstractmethod
+    def local_dir(self) -> str:
+        """Directory holding the files returned by ``local_path``."""
+
+    def presigned_url(self, key: str, filename: str) -> Optional[str]:
+        """A URL clients can download from directly, if the backend has one."""
+        return None
+
+
+class LocalStorage(PdfStorage):
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def put_file(self, key: str, path: str) -> bool:
+        target = self._path(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if os.path.exists(target):
+            os.utime(target)
+            os.unlink(path)
+            return False
+        os.replace(path, target)
+        return True
+
+    def size(self, key: str) -> int:
+        return os.path.getsize(self._path(key))
+
+    def iter_range(self, key: str, start: int, end: int) -> Iterator[bytes]:
+        with open(self._path(key), "rb") as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = f.read(min(STREAM_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+    def delete(self, key: str) -> None:
+        try:
+            os.unlink(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def list_keys(self, prefix: str) -> Iterator[Tuple[str, float]]:
+        base = self._path(prefix)
+        for dirpath, _, filenames in os.walk(base):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    mtime = os.path.getmtime(path)
+                except FileNotFoundError:
+                    continue
+                key = os.path.relpath(path, self.root)
+                yield key.replace(os.sep, "/"), mtime
+
+    def local_path(self, key: str) -> str:
+        return self._path(key)
+
+    def local_dir(self) -> str:
+        return self.root
+
+
+class S3Storage(PdfStorage):
+    """S3-compatible object storage, including MinIO and similar servers.
+
+    Uploads go through boto3's managed transfer, which switches to
+    multipart uploads above ``multipart_threshold`` bytes. Reads for
+    processing are cached under ``cache_dir``.
+    """
+    local_is_cache = True
+
+    def __init__(self,
+                 bucket: str,
+                 prefix: str = "",
+                 endpoint_url: Optional[str] = None,
+                 region: Optional[str] = None,
+                 presign_expiry: int = 300,
+                 cache_dir: str = os.path.join("cache", "pdfs"),
+                 multipart_threshold: int = 8 * 1024 * 1024):
+        try:
+            import boto3
+            from boto3.s3.transfer import TransferConfig
+        except ImportError as e:
+            raise RuntimeError(
+                "The s3 storage backend requires boto3 to be installed") from e
+
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.presign_expiry = presign_expiry
+        self.cache_dir = cache_dir
+        self.client = boto3.client("s3",
+                                   endpoint_url=endpoint_url,
+                                   region_name=region)
+        self.transfer_config = TransferConfig(
+            multipart_threshold=multipart_threshold,
+            multipart_chunksize=multipart_threshold)
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def _head(self, key: str) -> Optional[dict]:
+        from botocore.exceptions import ClientError
+        try:
+            return self.client.head_object(Bucket=self.bucket,
+                                           Key=self._key(key))
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey",
+                                                           "NotFound"):
+                return None
+            raise
+
+    def put_file(self, key: str, path: str) -> bool:
+        try:
+            if self._head(key) is not None:
+                # Copying onto itself refreshes LastModified for GC
+                self.client.copy_object(Bucket=self.bucket,
+                                        Key=self._key(key),
+                                        CopySource={
+                                            "Bucket": self.bucket,
+                                            "Key": self._key(key)
+                                        },
+                                        MetadataDirective="REPLACE",
+                                        ContentType="application/pdf")
+                return False
+
+            self.client.upload_file(
+                path,
+                self.bucket,
+                self._key(key),
+                ExtraArgs={"ContentType": "application/pdf"},
+                Config=self.transfer_config)
+            return True
+        finally:
+            os.unlink(path)
+
+    def size(self, key: str) -> int:
+        head = self._head(key)
+        if head is None:
+            raise FileNotFoundError(key)
+        return head["ContentLength"]
+
+    def iter_range(self, key: str, start: int, end: int) -> Iterator[bytes]:
+        resp = self.client.get_object(Bucket=self.bucket,
+                                      Key=self._key(key),
+                                      Range=f"bytes={start}-{end}")
+        yield from resp["Body"].iter_chunks(STREAM_CHUNK_SIZE)
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+    def list_keys(self, prefix: str) -> Iterator[Tuple[str, float]]:
+        paginator = self.client.get_paginator("list_objects_v2")
+        strip = len(self.prefix) + 1 if self.prefix else 0
+        for page in paginator.paginate(Bucket=self.bucket,
+                                       Prefix=self._key(prefix)):
+            for obj in page.get("Contents", []):
+                yield obj["Key"][strip:], obj["LastModified"].timestamp()
+
+    def local_path(self, key: str) -> str:
+        path = os.path.join(self.cache_dir, key)
+        if os.path.exists(path):
+            os.utime(path)
+            return path
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{time.monotonic_ns()}.part"
+        self.client.download_file(self.bucket,
+                                  self._key(key),
+                                  tmp_path,
+                                  Config=self.transfer_config)
+        os.replace(tmp_path, path)
+        return path
+
+    def local_dir(self) -> str:
+        return self.cache_dir
+
+    def presigned_url(self, key: str, filename: str) -> Optional[str]:
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={
+                "Bucket": self.bucket,
+                "Key": self._key(key),
+                "ResponseContentType": "application/pdf",
+                "ResponseContentDisposition": content_disposition(filename),
+            },
+            ExpiresIn=self.presign_expiry)
+
+
+_storage: Optional[PdfStorage] = None
+
+
+def get_storage() -> PdfStorage:
+    """Return the configured PDF storage backend."""
+    global _storage
+    if _storage is None:
+        backend = os.getenv("PDF_STORAGE_BACKEND", "local")
+        if backend == "local":
+            _storage = LocalStorage(os.getenv("PDF_STORAGE_ROOT", "uploads"))
+        elif backend == "s3":
+            bucket = os.getenv("S3_BUCKET")
+            if not bucket:
+                raise ValueError("S3_BUCKET not provided")
+            _storage = S3Storage(
+                bucket=bucket,
+                prefix=os.getenv("S3_PREFIX", ""),
+                endpoint_url=os.getenv("S3_ENDPOINT_URL") or None,
+                region=os.getenv("S3_REGION") or None,
+                presign_expiry=int(os.getenv("S3_PRESIGN_EXPIRY", "300")))
+        else:
+            raise ValueError(f"Unknown PDF_STORAGE_BACKEND: {backend}")
+    return _storage
+
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def parse_range(header: Optional[str],
+                size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single-range ``Range`` header into inclusive offsets.
+
+    Returns None when the whole object should be sent, and raises a 416
+    when the range cannot be satisfied.
+    """
+    if not header:
+        return None
+    match = _RANGE_RE.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        # Multiple or malformed ranges, fall back to the full body
+        return None
+
+    first, last = match.groups()
+    if first == "":
+        start, end = max(0, size - int(last)), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+
+    if start >= size or start > end:
+        raise HTTPException(status_code=416,
+                            detail="Requested range not satisfiable",
+                            headers={"Content-Range": f"bytes */{size}"})
+    return start, end
+
+
+async def pdf_response(request: Request, key: str, filename: str):
+    """Serve a stored PDF, redirecting to the backend when it can serve it."""
+    storage = get_storage()
+    redirect = os.getenv("PDF_PRESIGNED_REDIRECT", "true") == "true"
+    url = storage.presigned_url(key, filename) if redirect else None
+    if url:
+        return RedirectResponse(url, status_code=307)
+
+    try:
+        size = await asyncio.to_thread(storage.size, key)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="PDF file not found")
+
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": content_disposition(filename),
+    }
+    byte_range = parse_range(request.headers.get("range"), size)
+    if byte_range is None:
+        start, end, status_code = 0, size - 1, 200
+    else:
+        start, end = byte_range
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+
+    # Sync iterators are consumed on Starlette's thread pool
+    return StreamingResponse(storage.iter_range(key, start, end),
+                             status_code=status_code,
+                             media_type="application/pdf",
+                             headers=headers)
+
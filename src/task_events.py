@@ -0,0 +1,209 @@
+import asyncio
+import itertools
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Iterator, List, Optional, Set
+
+from task_logs import LogLine, task_logs
+
+FINISHED_STATUSES = ("succeeded", "failed")
+
+
+@dataclass(frozen=True)
+class TaskEvent:
+    """One Server-Sent Event: a status transition or a log line."""
+    event: str
+    data: Dict[str, Any]
+    # "<channel>-<seq>", None for snapshots that cannot be resumed from
+    id: Optional[str] = None
+
+    def format(self) -> str:
+        lines = [f"event: {self.event}"]
+        if self.id is not None:
+            lines.append(f"id: {self.id}")
+        lines.append(f"data: {json.dumps(self.data)}")
+        return "\n".join(lines) + "\n\n"
+
+
+class Subscription:
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, max_queued: int):
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.max_queued = max_queued
+        # Events the subscriber missed, in order, before it subscribed
+        self.backlog: List[TaskEvent] = []
+        # Whether the backlog continues from the client's Last-Event-ID
+        self.resumed = False
+        self.overflowed = False
+
+    def _put(self, event: TaskEvent) -> None:
+        if self.overflowed:
+            return
+        if self.queue.qsize() >= self.max_queued:
+            # Too slow to keep up: end the stream, the client reconnects
+            # and resumes from the history
+            self.overflowed = True
+            self.queue.put_nowait(None)
+        else:
+            self.queue.put_nowait(event)
+
+    def deliver(self, event: TaskEvent) -> None:
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self.loop:
+            self._put(event)
+        elif not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self._put, event)
+
+    async def next(self, timeout: float) -> Optional[TaskEvent]:
+        """The next event; None when the stream must end.
+
+        Raises TimeoutError when nothing arrived within ``timeout``.
+        """
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+
+@dataclass
+class _Channel:
+    name: str
+    history: Deque[TaskEvent]
+    seq: int = 0
+    subscribers: Set[Subscription] = field(default_factory=set)
+    finished_at: Optional[float] = None
+
+
+class TaskEventHub:
+    """In-process pub/sub of task status transitions and log lines.
+
+    Each task has a channel with a bounded history of recent events.
+    Event ids carry the channel name, so a client reconnecting with
+    ``Last-Event-ID`` gets exactly the events it missed while the channel
+    lives, and a full replay after the process restarted. Channels of
+    finished tasks are dropped ``finished_ttl`` seconds after the last
+    subscriber leaves.
+    """
+
+    def __init__(self,
+                 history: int = 1000,
+                 max_queued: int = 1000,
+                 finished_ttl: float = 300.0):
+        self.history = history
+        self.max_queued = max_queued
+        self.finished_ttl = finished_ttl
+        self._lock = threading.Lock()
+        self._channels: Dict[int, _Channel] = {}
+        # Differs between processes, so stale ids from before a restart
+        # never match
+        self._names = (f"{uuid.uuid4().hex[:8]}{n}"
+                       for n in itertools.count())
+        self.published = 0
+        self.overflows = 0
+
+    def _channel(self, task_id: int) -> _Channel:
+        channel = self._channels.get(task_id)
+        if channel is None:
+            channel = _Channel(next(self._names), deque(maxlen=self.history))
+            self._channels[task_id] = channel
+        return channel
+
+    def _publish(self, task_id: int, event: str,
+                 data: Dict[str, Any]) -> None:
+        with self._lock:
+            channel = self._channel(task_id)
+            channel.seq += 1
+            message = TaskEvent(event, data, f"{channel.name}-{channel.seq}")
+            channel.history.append(message)
+            subscribers = list(channel.subscribers)
+            self.published += 1
+            if event == "status":
+                channel.finished_at = (time.monotonic()
+                                       if data["status"] in FINISHED_STATUSES
+                                       else None)
+                self._prune()
+        for subscription in subscribers:
+            subscription.deliver(message)
+
+    def publish_status(self,
+                       task_id: int,
+                       status: str,
+                       error: Optional[str] = None) -> None:
+        self._publish(task_id, "status", {"status": status, "error": error})
+
+    def publish_log(self, task_id: int, line: LogLine) -> None:
+        self._publish(task_id, "log", {
+            "stream": line.stream,
+            "text": line.text,
+            "time": line.time
+        })
+
+    def _prune(self) -> None:
+        now = time.monotonic()
+        for task_id, channel in list(self._channels.items()):
+            if (channel.finished_at is not None and not channel.subscribers
+                    and now - channel.finished_at > self.finished_ttl):
+                del self._channels[task_id]
+
+    @contextmanager
+    def subscribe(self,
+                  task_id: int,
+                  last_event_id: Optional[str] = None
+                  ) -> Iterator[Subscription]:
+        """Subscribe to a task's events from the running event loop."""
+        subscription = Subscription(asyncio.get_running_loop(),
+                                    self.max_queued)
+        with self._lock:
+            self._prune()
+            # Also for tasks without events yet, they may start later
+            channel = self._channel(task_id)
+            name, _, seq = (last_event_id or "").rpartition("-")
+            if name == channel.name and seq.isdigit():
+                subscription.resumed = True
+                subscription.backlog = [
+                    e for e in channel.history
+                    if int(e.id.rpartition("-")[2]) > int(seq)
+                ]
+            else:
+                subscription.backlog = list(channel.history)
+            channel.subscribers.add(subscription)
+        try:
+            yield subscription
+        finally:
+            with self._lock:
+                if subscription.overflowed:
+                    self.overflows += 1
+                channel = self._channels.get(task_id)
+                if channel is not None:
+                    channel.subscribers.discard(subscription)
+                    if not channel.subscribers and channel.seq == 0:
+                        del self._channels[task_id]
+                    elif channel.finished_at is not None:
+                        # The TTL counts from the last subscriber leaving
+                        channel.finished_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "channels": len(self._channels),
+                "subscribers": sum(
+                    len(c.subscribers) for c in self._channels.values()),
+                "published": self.published,
+                "overflows": self.overflows,
+            }
+
+
+task_events = TaskEventHub(
+    int(os.getenv("TASK_EVENTS_HISTORY", "1000")),
+    int(os.getenv("TASK_EVENTS_MAX_QUEUED", "1000")),
+    float(os.getenv("TASK_EVENTS_FINISHED_TTL", "300")))
+
+# Every line a task writes to its log is also published live
+task_logs.add_listener(task_events.publish_log)
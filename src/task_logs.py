@@ -0,0 +1,217 @@
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import (Any, Callable, Deque, Dict, Iterator, List, Optional,
+                    Sequence)
+
+TASK_LOG_DIR = os.path.join("logs", "tasks")
+
+
+@dataclass(frozen=True)
+class LogLine:
+    seq: int
+    time: float
+    stream: str
+    text: str
+
+    def format(self) -> str:
+        stamp = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(self.time))
+        return f"{stamp}Z {self.stream} {self.text}\n"
+
+
+class TaskLog:
+    """Output of one task run: a bounded ring of recent lines plus a file.
+
+    The ring keeps the last ``ring_lines`` lines in memory for live
+    viewers. Every line is also appended to the task's log file until it
+    reaches ``max_bytes``; later lines only go to the ring. ``append`` is
+    called from the event loop, so it only queues lines; a writer thread
+    writes them to the file in batches.
+    """
+
+    def __init__(self,
+                 task_id: int,
+                 path: str,
+                 ring_lines: int,
+                 max_bytes: int,
+                 on_close: Optional[Callable[["TaskLog"], None]] = None,
+                 listeners: Sequence[Callable[[int, LogLine], None]] = ()):
+        self.task_id = task_id
+        self.path = path
+        self.max_bytes = max_bytes
+        self.on_close = on_close
+        self.listeners = listeners
+        self._ring: Deque[LogLine] = deque(maxlen=ring_lines)
+        self._lock = threading.Lock()
+        self._pending_changed = threading.Condition(self._lock)
+        self._pending: List[str] = []
+        self._closing = False
+        self._seq = 0
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Retries of a task append to the same file
+        self._file = open(path, "a", encoding="utf-8", errors="replace")
+        self._written = self._file.tell()
+        self._truncated = False
+        self.dropped = 0
+        self._writer = threading.Thread(target=self._write_pending,
+                                        name=f"task-log-{task_id}",
+                                        daemon=True)
+        self._writer.start()
+
+    def append(self, stream: str, text: str) -> LogLine:
+        with self._lock:
+            self._seq += 1
+            line = LogLine(self._seq, time.time(), stream, text)
+            self._ring.append(line)
+            formatted = line.format()
+            size = len(formatted.encode("utf-8", "replace"))
+            # Once closing, lines only go to the ring
+            if not self._closing and self._written + size <= self.max_bytes:
+                self._queue(formatted)
+                self._written += size
+            elif not self._closing:
+                self.dropped += 1
+                if not self._truncated:
+                    self._truncated = True
+                    self._queue(f"... log truncated at "
+                                f"{self.max_bytes} bytes\n")
+        for listener in self.listeners:
+            try:
+                listener(self.task_id, line)
+            except Exception as e:
+                print(f"Error in task log listener: {e}")
+        return line
+
+    def _queue(self, text: str) -> None:
+        # Called with the lock held; the writer only needs waking once per
+        # batch, it takes everything queued meanwhile
+        if not self._pending:
+            self._pending_changed.notify()
+        self._pending.append(text)
+
+    def _write_pending(self) -> None:
+        while True:
+            with self._lock:
+                while not self._pending and not self._closing:
+                    self._pending_changed.wait()
+                batch, self._pending = self._pending, []
+                closing = self._closing
+            if batch:
+                try:
+                    self._file.write("".join(batch))
+                    self._file.flush()
+                except OSError as e:
+                    print(f"Error writing task log {self.path}: {e}")
+            elif closing:
+                break
+        self._file.close()
+
+    def tail(self, count: Optional[int] = None) -> List[LogLine]:
+        with self._lock:
+            lines = list(self._ring)
+        return lines if count is None else lines[-count:]
+
+    def since(self, seq: int) -> List[LogLine]:
+        """Lines after ``seq`` that are still in the ring."""
+        with self._lock:
+            return [line for line in self._ring if line.seq > seq]
+
+    def stop(self) -> None:
+        """Stop logging to the file; the writer finishes the queued lines."""
+        with self._lock:
+            self._closing = True
+            self._pending_changed.notify()
+
+    async def aclose(self) -> None:
+        """Stop logging to the file once the queued lines are written.
+
+        The writer thread is joined off the event loop.
+        """
+        self.stop()
+        await asyncio.to_thread(self._writer.join)
+        if self.on_close is not None:
+            self.on_close(self)
+
+    async def __aenter__(self) -> "TaskLog":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+
+class TaskLogStore:
+    """Per-task log files under ``directory``, with the open ones tracked."""
+
+    def __init__(self,
+                 directory: str = TASK_LOG_DIR,
+                 ring_lines: int = 1000,
+                 max_bytes: int = 16 * 1024 * 1024):
+        self.directory = directory
+        self.ring_lines = ring_lines
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._open: Dict[int, TaskLog] = {}
+        self._listeners: List[Callable[[int, LogLine], None]] = []
+
+    def add_listener(self, listener: Callable[[int, LogLine], None]) -> None:
+        """Call ``listener(task_id, line)`` for every line of every task."""
+        self._listeners.append(listener)
+
+    def path(self, task_id: int) -> str:
+        return os.path.join(self.directory, f"{task_id}.log")
+
+    def open(self, task_id: int) -> TaskLog:
+        """Start logging a run; use as an async context manager to close it.
+
+        A previous run of the task still logging in this process stops
+        writing to the file, so only one run appends to it.
+        """
+        log = TaskLog(task_id, self.path(task_id), self.ring_lines,
+                      self.max_bytes, self._forget, self._listeners)
+        with self._lock:
+            previous = self._open.get(task_id)
+            self._open[task_id] = log
+        if previous is not None:
+            previous.stop()
+        return log
+
+    def get(self, task_id: int) -> Optional[TaskLog]:
+        """The log of a run in progress in this process, if any."""
+        with self._lock:
+            return self._open.get(task_id)
+
+    def _forget(self, log: TaskLog) -> None:
+        with self._lock:
+            if self._open.get(log.task_id) is log:
+                del self._open[log.task_id]
+
+    def read(self, task_id: int) -> Iterator[str]:
+        """Persisted lines of a task, from every run."""
+        try:
+            with open(self.path(task_id), encoding="utf-8",
+                      errors="replace") as f:
+                yield from f
+        except FileNotFoundError:
+            return
+
+    def read_tail(self, task_id: int, count: int) -> List[str]:
+        return list(deque(self.read(task_id), maxlen=count))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            logs = list(self._open.values())
+        return {
+            "open": len(logs),
+            "ring_lines": self.ring_lines,
+            "max_bytes": self.max_bytes,
+            "dropped_lines": sum(log.dropped for log in logs),
+        }
+
+
+task_logs = TaskLogStore(
+    os.getenv("TASK_LOG_DIR", TASK_LOG_DIR),
+    int(os.getenv("TASK_LOG_RING_LINES", "1000")),
+    int(os.getenv("TASK_LOG_MAX_BYTES", str(16 * 1024 * 1024))))
@@ -0,0 +1,130 @@
+import itertools
+import os
+import shutil
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, List, TextIO
+
+# Written into the task checkout, which is mounted at /workspace in the
+# sandbox, so the agent reads the specification with its file tools
+PROMPT_DIR = ".ghostdev"
+SANDBOX_WORKSPACE = "/workspace"
+# Rough size of a token in English text, enough to budget chunk sizes
+CHARS_PER_TOKEN = 4
+
+
+@dataclass(frozen=True)
+class TaskPrompt:
+    """The specification of one run, written to files in its workspace."""
+    # Entry point, relative to the workspace: the whole specification or,
+    # for long documents, an index of its parts
+    entry: str
+    parts: List[str]
+    chars: int
+
+    def instruction(self) -> str:
+        """The short task passed to OpenHands on its command line."""
+        entry = f"{SANDBOX_WORKSPACE}/{self.entry}"
+        if len(self.parts) > 1:
+            read = (f"The specification is split into {len(self.parts)} "
+                    f"parts listed in {entry}; read all of them, in order")
+        else:
+            read = f"Read the specification in {entry}"
+        return (f"{read}, then implement it in this repository. Do not "
+                f"modify or commit the {PROMPT_DIR} directory.")
+
+
+def split_text(source: TextIO, max_chars: int) -> Iterator[str]:
+    """Split the text read from ``source`` into chunks of at most
+    ``max_chars`` characters.
+
+    Chunks end at a line break where possible, then at a space, so a part
+    rarely cuts a sentence in half. Only about one chunk is held in memory.
+    """
+    text = ""
+    done = False
+    yielded = False
+    while True:
+        while not done and len(text) <= max_chars:
+            data = source.read(max_chars)
+            done = not data
+            text += data
+        if len(text) <= max_chars:
+            break
+        cut = text.rfind("\n", 0, max_chars)
+        if cut <= 0:
+            cut = text.rfind(" ", 0, max_chars)
+        if cut <= 0:
+            cut = max_chars
+        yield text[:cut]
+        yielded = True
+        if cut < max_chars and text[cut] in "\n ":
+            cut += 1
+        text = text[cut:]
+    if text or not yielded:
+        yield text
+
+
+def _exclude_from_git(workspace: Path) -> None:
+    # Keeps the agent from committing the prompt files, without touching
+    # the repository's own .gitignore
+    exclude = workspace / ".git" / "info" / "exclude"
+    if not exclude.parent.is_dir():
+        return
+    pattern = f"/{PROMPT_DIR}/"
+    existing = exclude.read_text() if exclude.exists() else ""
+    if pattern not in existing.splitlines():
+        with open(exclude, "a") as f:
+            if existing and not existing.endswith("\n"):
+                f.write("\n")
+            f.write(pattern + "\n")
+
+
+def write_task_prompt(workspace: Path,
+                      text: TextIO,
+                      chunk_tokens: int = 8000) -> TaskPrompt:
+    """Write the text read from ``text`` into ``workspace`` for the agent.
+
+    Documents longer than ``chunk_tokens`` are split into numbered parts
+    under ``.ghostdev/parts/`` with ``.ghostdev/task.md`` listing them, so
+    each part fits comfortably in the model's context when opened.
+    """
+    directory = workspace / PROMPT_DIR
+    shutil.rmtree(directory, ignore_errors=True)
+    directory.mkdir(parents=True)
+    _exclude_from_git(workspace)
+
+    entry = f"{PROMPT_DIR}/task.md"
+    chunks = split_text(text, chunk_tokens * CHARS_PER_TOKEN)
+    first = next(chunks)
+    second = next(chunks, None)
+    if second is None:
+        (workspace / entry).write_text(first, encoding="utf-8")
+        return TaskPrompt(entry, [entry], len(first))
+
+    (directory / "parts").mkdir()
+    parts = []
+    chars = 0
+    for number, chunk in enumerate(itertools.chain((first, second), chunks),
+                                   start=1):
+        part = f"{PROMPT_DIR}/parts/{number:03d}.md"
+        (workspace / part).write_text(chunk, encoding="utf-8")
+        parts.append(part)
+        chars += len(chunk)
+
+    index = [
+        "# Task specification",
+        "",
+        f"The specification is {chars} characters long and split into "
+        f"{len(parts)} parts. Read every part, in order, before making "
+        "changes:",
+        "",
+    ]
+    index += [f"{n}. {SANDBOX_WORKSPACE}/{part}"
+              for n, part in enumerate(parts, start=1)]
+    (workspace / entry).write_text("\n".join(index) + "\n", encoding="utf-8")
+    return TaskPrompt(entry, parts, chars)
+
+
+def prompt_chunk_tokens() -> int:
+    return int(os.getenv("PROMPT_CHUNK_TOKENS", "8000"))
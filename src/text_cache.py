@@ -0,0 +1,164 @@
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, TextIO
+
+TEXT_CACHE_DIR = os.path.join("cache", "text")
+
+
+class TextCache:
+    """Persistent cache of extracted PDF text, bounded to ``max_bytes`` on disk.
+
+    Entries are files named after the document hash and a fingerprint of
+    the extraction settings, so changing the settings never serves stale
+    text. Reads refresh an entry's mtime and eviction removes the least
+    recently used entries first. Several processes may share a directory;
+    writes are atomic and each process evicts from its own view of it.
+    """
+
+    def __init__(self, directory: str = TEXT_CACHE_DIR,
+                 max_bytes: int = 256 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # Key -> [lock, number of callers holding or waiting for it]
+        self._key_locks: Dict[str, List[Any]] = {}
+        self._size: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _path(self, sha256: str, fingerprint: str) -> str:
+        return os.path.join(self.directory, sha256[:2],
+                            f"{sha256}-{fingerprint}.txt")
+
+    @contextmanager
+    def key_lock(self, sha256: str, fingerprint: str) -> Iterator[None]:
+        """Held while filling one entry, so concurrent callers build it once.
+
+        The lock is dropped when its last caller leaves, whether the entry
+        was filled or building it raised.
+        """
+        key = f"{sha256}-{fingerprint}"
+        with self._lock:
+            entry = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._key_locks[key]
+
+    def open(self,
+             sha256: str,
+             fingerprint: str,
+             record: bool = True) -> Optional[TextIO]:
+        """The cached text as an open file, or None.
+
+        The caller closes it. An open entry stays readable if it is evicted
+        meanwhile. Pass ``record=False`` when re-checking after a lookup
+        that was already counted, so one request is not counted twice.
+        """
+        path = self._path(sha256, fingerprint)
+        try:
+            f = open(path, encoding="utf-8")
+        except FileNotFoundError:
+            if record:
+                with self._lock:
+                    self.misses += 1
+            return None
+
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            # Evicted after opening, the open file is still complete
+            pass
+        if record:
+            with self._lock:
+                self.hits += 1
+        return f
+
+    def fill(self, sha256: str, fingerprint: str,
+             write: Callable[[TextIO], Any]) -> TextIO:
+        """Build an entry with ``write(f)`` and return it opened for reading.
+
+        The text is written straight to a temporary file next to the entry
+        and renamed into place, so it is never held in memory and readers
+        never see a partial entry.
+        """
+        path = self._path(sha256, fingerprint)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path),
+                                        suffix=".part")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                write(f)
+            # Another process or an earlier extraction may have written it
+            try:
+                replaced = os.path.getsize(path)
+            except FileNotFoundError:
+                replaced = 0
+            os.replace(tmp_path, path)
+            # Before eviction, which may remove an entry larger than the cache
+            reader = open(path, encoding="utf-8")
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+        with self._lock:
+            if self._size is not None:
+                self._size += os.fstat(reader.fileno()).st_size - replaced
+            over = self._size is None or self._size > self.max_bytes
+        if over:
+            self._evict()
+        return reader
+
+    def _entries(self):
+        if not os.path.isdir(self.directory):
+            return
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith(".txt"):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    yield entry.path, stat.st_size, stat.st_mtime
+
+    def _evict(self) -> None:
+        # Listing a large cache is slow, so only the deletions hold the lock
+        entries = sorted(self._entries(), key=lambda e: e[2])
+        with self._lock:
+            size = sum(e[1] for e in entries)
+            for path, entry_size, _ in entries:
+                if size <= self.max_bytes:
+                    break
+                try:
+                    os.unlink(path)
+                    self.evictions += 1
+                except FileNotFoundError:
+                    pass
+                size -= entry_size
+            self._size = size
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_bytes": self.max_bytes,
+                "size_bytes": self._size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+text_cache = TextCache(
+    os.getenv("TEXT_CACHE_DIR", TEXT_CACHE_DIR),
+    int(os.getenv("TEXT_CACHE_MAX_BYTES", str(256 * 1024 * 1024))))
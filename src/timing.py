@@ -0,0 +1,31 @@
+import time
+from typing import Awaitable, Dict, TypeVar
+
+T = TypeVar("T")
+
+
+class RequestTimer:
+    """Collect named spans for one request and render a Server-Timing header.
+
+    Spans may overlap when awaited concurrently, so comparing each span with
+    the total shows which one sits on the critical path.
+    """
+
+    def __init__(self):
+        self._start = time.perf_counter()
+        self.spans: Dict[str, float] = {}
+
+    async def measure(self, name: str, awaitable: Awaitable[T]) -> T:
+        started = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            self.spans[name] = (time.perf_counter() - started) * 1000
+
+    def total(self) -> float:
+        return (time.perf_counter() - self._start) * 1000
+
+    def header(self) -> str:
+        spans = {**self.spans, "total": self.total()}
+        return ", ".join(f"{name};dur={duration:.1f}"
+                         for name, duration in spans.items())
@@ -0,0 +1,208 @@
+import asyncio
+import hashlib
+import os
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from fastapi import HTTPException, Request, UploadFile
+from fastapi.responses import JSONResponse
+
+from db import get_db_connection
+from storage import get_storage
+
+# Content-addressed PDF store, see blob_key
+BLOB_PREFIX = "blobs/"
+BLOB_GC_GRACE_SECONDS = int(os.getenv("PDF_GC_GRACE_SECONDS", "3600"))
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(25 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# Room for the multipart boundaries and the other form fields
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+# The PDF header may be preceded by junk within the first 1024 bytes
+PDF_MAGIC = b"%PDF-"
+PDF_MAGIC_WINDOW = 1024
+
+
+@dataclass(frozen=True)
+class SavedUpload:
+    key: str
+    sha256: str
+    size: int
+
+
+def _too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"PDF exceeds the {max_bytes // (1024 * 1024)} MB upload limit")
+
+
+def _write_chunk(out, hasher, chunk: bytes) -> None:
+    # hashlib releases the GIL for large buffers, so both stay off the loop
+    hasher.update(chunk)
+    out.write(chunk)
+
+
+def _finish(out) -> None:
+    out.flush()
+    os.fsync(out.fileno())
+    out.close()
+
+
+def blob_tmp_dir() -> str:
+    """Where uploads are staged while hashing, whichever backend stores them.
+
+    Under the storage root, so committing a local blob is a rename on the
+    same file system.
+    """
+    return os.path.join(get_storage().local_dir(), BLOB_PREFIX, "tmp")
+
+
+def blob_key(sha256: str) -> str:
+    """Storage key of a PDF, sharded by the first byte of its hash."""
+    return f"{BLOB_PREFIX}{sha256[:2]}/{sha256}.pdf"
+
+
+def _commit_blob(tmp_path: str, sha256: str) -> str:
+    key = blob_key(sha256)
+    # When the same content is already stored the backend keeps it and
+    # refreshes its modification time, so garbage collection treats it as
+    # in use until the task row lands.
+    get_storage().put_file(key, tmp_path)
+    return key
+
+
+def local_pdf_path(pdf_file_path: str, pdf_sha256: Optional[str]) -> str:
+    """Local file with a task's PDF, fetching it from storage if needed.
+
+    Tasks created before PDFs were content-addressed only have a path.
+    """
+    if pdf_sha256 is None:
+        return pdf_file_path
+    return get_storage().local_path(blob_key(pdf_sha256))
+
+
+async def save_pdf_upload(file: UploadFile,
+                          max_bytes: int = MAX_UPLOAD_BYTES) -> SavedUpload:
+    """Stream an uploaded PDF into the content-addressed store.
+
+    The upload is hashed while it is written to a local temporary file, then
+    handed to the storage backend under its hash-derived key. Uploading a
+    document that is already stored keeps the existing copy.
+    """
+    if file.size is not None and file.size > max_bytes:
+        raise _too_large(max_bytes)
+
+    tmp_dir = blob_tmp_dir()
+    os.makedirs(tmp_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=tmp_dir, suffix=".part")
+    out = os.fdopen(fd, "wb")
+    hasher = hashlib.sha256()
+    size = 0
+    head = b""
+    try:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            if len(head) < PDF_MAGIC_WINDOW:
+                head += chunk[:PDF_MAGIC_WINDOW - len(head)]
+                if len(head) >= PDF_MAGIC_WINDOW and PDF_MAGIC not in head:
+                    raise HTTPException(status_code=400,
+                                        detail="File is not a valid PDF")
+
+            size += len(chunk)
+            if size > max_bytes:
+                raise _too_large(max_bytes)
+
+            await asyncio.to_thread(_write_chunk, out, hasher, chunk)
+
+        if PDF_MAGIC not in head:
+            raise HTTPException(status_code=400,
+                                detail="File is not a valid PDF")
+
+        await asyncio.to_thread(_finish, out)
+        sha256 = hasher.hexdigest()
+        key = await asyncio.to_thread(_commit_blob, tmp_path, sha256)
+    except BaseException:
+        out.close()
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+    return SavedUpload(key=key, sha256=sha256, size=size)
+
+
+def register_pdf_blob(cur, upload: SavedUpload) -> None:
+    """Record a stored PDF inside the caller's transaction.
+
+    Reference counts are maintained by a trigger on "Task", so this only
+    makes sure the row exists and marks it as recently referenced.
+    """
+    cur.execute(
+        """
+        INSERT INTO "PdfBlob" (sha256, size)
+        VALUES (%s, %s)
+        ON CONFLICT (sha256) DO UPDATE SET last_referenced_at = NOW()
+        """, (upload.sha256, upload.size))
+
+
+def collect_pdf_garbage(grace_seconds: int = BLOB_GC_GRACE_SECONDS) -> int:
+    """Delete stored PDFs no task references, returning how many went.
+
+    Blobs and files younger than ``grace_seconds`` are kept so uploads whose
+    task is still being created are not collected.
+    """
+    cutoff = time.time() - grace_seconds
+    with get_db_connection() as conn, conn.cursor() as cur:
+        cur.execute(
+            """
+            DELETE FROM "PdfBlob"
+            WHERE ref_count = 0
+            AND last_referenced_at < NOW() - make_interval(secs => %s)
+            RETURNING sha256
+            """, (grace_seconds, ))
+        unreferenced = [row[0] for row in cur.fetchall()]
+        cur.execute('SELECT sha256 FROM "PdfBlob"')
+        known = {row[0] for row in cur.fetchall()}
+
+    storage = get_storage()
+    removed = 0
+    for key, modified in list(_stored_blob_keys()):
+        sha256 = key.rsplit("/", 1)[-1][:-len(".pdf")]
+        if sha256 in known:
+            continue
+        # Covers unreferenced blobs and files whose task insert never landed
+        if modified < cutoff:
+            storage.delete(key)
+            removed += 1
+
+    # Temporary files left behind by interrupted uploads
+    tmp_dir = blob_tmp_dir()
+    if os.path.isdir(tmp_dir):
+        for entry in os.scandir(tmp_dir):
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.unlink(entry.path)
+            except FileNotFoundError:
+                pass
+
+    if unreferenced or removed:
+        print(f"PDF store: dropped {len(unreferenced)} unreferenced blobs, "
+              f"removed {removed} files")
+    return removed
+
+
+def _stored_blob_keys():
+    for key, modified in get_storage().list_keys(BLOB_PREFIX):
+        if key.endswith(".pdf") and not key.startswith(f"{BLOB_PREFIX}tmp/"):
+            yield key, modified
+
+
+async def limit_upload_size(request: Request, call_next):
+    """Reject oversized task uploads before their body is read."""
+    if request.method == "POST" and request.url.path == "/api/tasks":
+        content_length = request.headers.get("content-length")
+        if content_length and content_length.isdigit() and int(
+                content_length) > MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES:
+            error = _too_large(MAX_UPLOAD_BYTES)
+            return JSONResponse(status_code=error.status_code,
+                                content={"detail": error.detail})
+    return await call_next(request)
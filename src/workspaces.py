@@ -0,0 +1,264 @@
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from db import get_db_connection
+from git_mirror import GitMirrorCache, git_mirrors
+from storage import get_storage
+
+CHECKOUT = "checkout"
+MIRROR = "mirror"
+UPLOAD = "upload"
+
+# Cheapest to rebuild first when several entries were last used together
+EVICTION_ORDER = {CHECKOUT: 0, MIRROR: 1, UPLOAD: 2}
+
+
+@dataclass
+class WorkspaceEntry:
+    kind: str
+    path: Path
+    size: int
+    last_used: float
+    repo_id: Optional[int] = None
+    task_id: Optional[int] = None
+    sha256: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class ActiveReferences:
+    """What tasks that have not finished yet still need on disk."""
+    running_task_ids: Set[int]
+    running_repo_ids: Set[int]
+    pdf_sha256s: Set[str]
+
+
+def fetch_active_references() -> ActiveReferences:
+    with get_db_connection() as conn, conn.cursor() as cur:
+        cur.execute("""
+            SELECT task_id, repo_id, pdf_sha256, status
+            FROM "Task"
+            WHERE status IN ('pending', 'running')
+            """)
+        rows = cur.fetchall()
+    running = [row for row in rows if row[3] == 'running']
+    return ActiveReferences(
+        running_task_ids={row[0]
+                          for row in running},
+        running_repo_ids={row[1]
+                          for row in running},
+        pdf_sha256s={row[2]
+                     for row in rows if row[2]})
+
+
+def _tree_size(path: Path) -> int:
+    if path.is_file():
+        return path.stat().st_size
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                # Hardlinked git objects are counted in every checkout
+                total += os.lstat(os.path.join(dirpath, name)).st_size
+            except FileNotFoundError:
+                pass
+    return total
+
+
+class WorkspaceManager:
+    """Keep task checkouts, repository mirrors and local PDFs under a quota.
+
+    Usage is measured by scanning the directories; sizes of directory trees
+    are cached while their modification time is unchanged. When the total
+    goes over ``max_bytes``, entries are evicted least recently used first.
+    Checkouts of running tasks, mirrors of repositories with running tasks
+    and PDFs of pending or running tasks are never evicted.
+
+    Local PDFs are only evicted when they are download caches of an object
+    store. With the local storage backend they are the stored copies, so
+    they count towards usage but are never deleted here; unreferenced ones
+    are garbage-collected through their ``PdfBlob`` row instead.
+    """
+
+    def __init__(self,
+                 max_bytes: int,
+                 mirrors: GitMirrorCache = git_mirrors,
+                 upload_dir: Optional[Path] = None,
+                 uploads_are_cache: Optional[bool] = None,
+                 active_references: Callable[[], ActiveReferences] = (
+                     fetch_active_references)):
+        self.max_bytes = max_bytes
+        self.mirrors = mirrors
+        self.upload_dir = upload_dir
+        self.uploads_are_cache = uploads_are_cache
+        self.active_references = active_references
+        self._lock = threading.Lock()
+        self._sizes: Dict[Path, Tuple[float, int]] = {}
+        self.usage: Dict[str, int] = {CHECKOUT: 0, MIRROR: 0, UPLOAD: 0}
+        self.entries = 0
+        self.protected_bytes = 0
+        self.evictions = 0
+        self.evicted_bytes = 0
+        self.last_run_at: Optional[float] = None
+
+    def _uploads_dir(self) -> Path:
+        if self.upload_dir is not None:
+            return self.upload_dir
+        return Path(get_storage().local_dir()) / "blobs"
+
+    def _uploads_evictable(self) -> bool:
+        if self.uploads_are_cache is not None:
+            return self.uploads_are_cache
+        return get_storage().local_is_cache
+
+    def _size(self, path: Path, mtime: float, fresh: bool) -> int:
+        cached = self._sizes.get(path)
+        if not fresh and cached is not None and cached[0] == mtime:
+            return cached[1]
+        size = _tree_size(path)
+        self._sizes[path] = (mtime, size)
+        return size
+
+    def _entry(self,
+               kind: str,
+               path: Path,
+               fresh: bool = False,
+               **ids) -> Optional[WorkspaceEntry]:
+        try:
+            mtime = path.stat().st_mtime
+        except FileNotFoundError:
+            return None
+        return WorkspaceEntry(kind, path, self._size(path, mtime, fresh),
+                              mtime, **ids)
+
+    def scan(self, running_task_ids: Set[int] = frozenset()
+             ) -> List[WorkspaceEntry]:
+        """List every tracked entry with its size and last use.
+
+        Checkouts of running tasks are re-measured on every scan, as files
+        change below their top-level directory.
+        """
+        entries = []
+        workspaces = self.mirrors.workspaces_dir
+        if workspaces.is_dir():
+            for repo_dir in workspaces.iterdir():
+                if not repo_dir.is_dir() or not repo_dir.name.isdigit():
+                    continue
+                for task_dir in repo_dir.iterdir():
+                    if task_dir.is_dir() and task_dir.name.isdigit():
+                        task_id = int(task_dir.name)
+                        entries.append(
+                            self._entry(CHECKOUT,
+                                        task_dir,
+                                        task_id in running_task_ids,
+                                        repo_id=int(repo_dir.name),
+                                        task_id=task_id))
+
+        if self.mirrors.mirrors_dir.is_dir():
+            for mirror in self.mirrors.mirrors_dir.glob("*.git"):
+                if mirror.stem.isdigit():
+                    entries.append(
+                        self._entry(MIRROR, mirror, repo_id=int(mirror.stem)))
+
+        uploads = self._uploads_dir()
+        if uploads.is_dir():
+            for pdf in uploads.glob("*/*.pdf"):
+                if pdf.parent.name != "tmp":
+                    entries.append(self._entry(UPLOAD, pdf, sha256=pdf.stem))
+
+        found = {entry.path for entry in entries if entry is not None}
+        self._sizes = {p: s for p, s in self._sizes.items() if p in found}
+        return [entry for entry in entries if entry is not None]
+
+    def _protected(self, entry: WorkspaceEntry, refs: ActiveReferences,
+                   uploads_evictable: bool) -> bool:
+        if entry.kind == CHECKOUT:
+            return entry.task_id in refs.running_task_ids
+        if entry.kind == MIRROR:
+            return entry.repo_id in refs.running_repo_ids
+        # The only copy of a stored PDF cannot be rebuilt
+        return not uploads_evictable or entry.sha256 in refs.pdf_sha256s
+
+    def _evict(self, entry: WorkspaceEntry) -> None:
+        if entry.kind == CHECKOUT:
+            self.mirrors.remove_checkout(entry.repo_id, entry.task_id)
+        elif entry.kind == MIRROR:
+            self.mirrors.remove_mirror(entry.repo_id)
+        else:
+            try:
+                entry.path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def enforce(self, local_task_ids: Iterable[int] = ()) -> int:
+        """Evict least recently used entries until usage fits the quota.
+
+        ``local_task_ids`` are tasks running in this process, protected
+        even before their status reaches the database. Returns the number
+        of bytes freed.
+        """
+        with self._lock:
+            refs = self.active_references()
+            refs = ActiveReferences(
+                refs.running_task_ids | set(local_task_ids),
+                refs.running_repo_ids, refs.pdf_sha256s)
+            uploads_evictable = self._uploads_evictable()
+
+            entries = self.scan(refs.running_task_ids)
+            total = sum(entry.size for entry in entries)
+            freed = 0
+            candidates = sorted(
+                (e for e in entries
+                 if not self._protected(e, refs, uploads_evictable)),
+                key=lambda e: (e.last_used, EVICTION_ORDER[e.kind]))
+            for entry in candidates:
+                if total - freed <= self.max_bytes:
+                    break
+                self._evict(entry)
+                freed += entry.size
+                self.evictions += 1
+                self.evicted_bytes += entry.size
+                entries.remove(entry)
+                print(f"Workspace quota: evicted {entry.kind} {entry.path} "
+                      f"({entry.size} bytes)")
+
+            self.usage = {kind: 0 for kind in EVICTION_ORDER}
+            for entry in entries:
+                self.usage[entry.kind] += entry.size
+            self.entries = len(entries)
+            self.protected_bytes = sum(
+                e.size for e in entries
+                if self._protected(e, refs, uploads_evictable))
+            self.last_run_at = time.time()
+
+            if total - freed > self.max_bytes:
+                print(f"Workspace quota: {total - freed} bytes in use, over "
+                      f"the {self.max_bytes} byte quota")
+            return freed
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_bytes": self.max_bytes,
+            "used_bytes": sum(self.usage.values()),
+            "usage_bytes": dict(self.usage),
+            "protected_bytes": self.protected_bytes,
+            "entries": self.entries,
+            "evictions": self.evictions,
+            "evicted_bytes": self.evicted_bytes,
+            "last_run_at": self.last_run_at,
+        }
+
+
+workspace_manager: Optional[WorkspaceManager] = None
+
+
+def get_workspace_manager() -> WorkspaceManager:
+    global workspace_manager
+    if workspace_manager is None:
+        workspace_manager = WorkspaceManager(
+            int(os.getenv("WORKSPACE_QUOTA_BYTES", str(20 * 1024**3))))
+    return workspace_manager
+